@@ -0,0 +1,464 @@
+"""
+asyncio counterpart of db.py for callers running on an event loop.
+
+The query functions have the same names, arguments and return values as
+in db.py and run the same SQL, so the two modules can be used side by side;
+iter_guests_for_links is an async generator here. The best score cache
+(_score_cache.py), cursors, pool settings and DB_PREPARED_STATEMENTS are
+shared with db.py, and the helpers that do no I/O
+(get_best_score_cache_stats, invalidate_best_score_cache,
+latest_messages_cursor and the cursor encoders) are re-exported from it.
+
+Only in db.py (synchronous):
+- init_db and get_schema_version (schema migrations)
+- bulk_create_guests and bulk_update_guests (COPY/batch guest helpers)
+- get_db_stats and reset_db_stats (per-thread timing of get_db blocks)
+
+The pool is bound to the event loop that first opens it; call close_pool()
+before that loop shuts down.
+"""
+import asyncio
+import time as time_module
+import psycopg
+from psycopg.rows import dict_row
+from contextlib import asynccontextmanager
+
+try:
+    from psycopg_pool import AsyncConnectionPool
+except ImportError:  # pool extra not installed: fall back to one-shot connections
+    AsyncConnectionPool = None
+
+import db
+import _score_cache as score_cache
+from db import (
+    ALL_GUESTS_SQL,
+    ALL_MESSAGES_SQL,
+    APPROVED_MESSAGES_SQL,
+    APPROVED_MESSAGES_VERSION_SQL,
+    BEST_SCORE_SQL,
+    CREATE_GUEST_SQL,
+    CREATE_MESSAGE_SQL,
+    CREATE_SCORE_SQL,
+    CREATE_SCORE_WITH_RANK_SQL,
+    DELETE_GUEST_SQL,
+    DELETE_MESSAGE_SQL,
+    GUEST_BY_ID_SQL,
+    GUEST_BY_UUID_SQL,
+    GUEST_LINKS_BATCH_SIZE,
+    GUESTS_FOR_LINKS_SQL,
+    MARK_LINKS_GENERATED_SQL,
+    MESSAGES_FEED_FIRST_SQL,
+    MESSAGES_FEED_MAX_LIMIT,
+    MESSAGES_SINCE_SQL,
+    MESSAGE_STATUSES,
+    PENDING_MESSAGES_SQL,
+    PREPARED_STATEMENTS,
+    SCORES_PAGE_AFTER_SQL,
+    SCORES_PAGE_DEFAULT_LIMIT,
+    SCORES_PAGE_FIRST_SQL,
+    SCORES_PAGE_MAX_LIMIT,
+    UPDATE_MESSAGE_STATUS_SQL,
+    UPDATE_RSVP_SQL,
+    UPDATE_RSVP_WITH_COMPANIONS_SQL,
+    clean_guest_update,
+    decode_messages_cursor,
+    decode_scores_cursor,
+    encode_messages_cursor,
+    encode_scores_cursor,
+    get_best_score_cache_stats,
+    invalidate_best_score_cache,
+    latest_messages_cursor,
+    update_guest_query,
+)
+
+_pool = None
+_pool_lock = asyncio.Lock()
+
+
+async def get_db_connection():
+    """Get a new (unpooled) async PostgreSQL connection from Supabase"""
+    return await psycopg.AsyncConnection.connect(
+        db.get_connection_string(), **db.get_connection_kwargs()
+    )
+
+
+async def get_pool():
+    """Returns the async connection pool, opening it on first use.
+
+    Returns None when pooling is disabled (DB_POOL_ENABLED=false) or the
+    psycopg_pool package is not available.
+    """
+    global _pool
+    if not db.POOL_ENABLED or AsyncConnectionPool is None:
+        return None
+
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                pool = AsyncConnectionPool(
+                    db.get_connection_string(),
+                    kwargs=db.get_connection_kwargs(),
+                    min_size=db.POOL_MIN_SIZE,
+                    max_size=db.POOL_MAX_SIZE,
+                    max_idle=db.POOL_MAX_IDLE,
+                    max_lifetime=db.POOL_MAX_LIFETIME,
+                    timeout=db.POOL_TIMEOUT,
+                    # Health check on checkout: drops connections the pooler closed
+                    check=AsyncConnectionPool.check_connection,
+                    name="wedding-db-async",
+                    open=False,
+                )
+                await pool.open()
+                _pool = pool
+    return _pool
+
+
+async def close_pool():
+    """Closes the async connection pool (if any)"""
+    global _pool
+    async with _pool_lock:
+        if _pool is not None:
+            await _pool.close()
+            _pool = None
+
+
+@asynccontextmanager
+async def get_db():
+    """Async context manager to handle database connections.
+
+    Borrows a connection from the pool and returns it at the end of the block;
+    falls back to a one-shot connection when pooling is disabled.
+    """
+    pool = await get_pool()
+    if pool is not None:
+        # The pool commits on success and rolls back on error
+        async with pool.connection() as conn:
+            yield conn
+        return
+
+    conn = await get_db_connection()
+    try:
+        yield conn
+        await conn.commit()
+    except Exception:
+        await conn.rollback()
+        raise
+    finally:
+        await conn.close()
+
+
+async def _fetch_best_score():
+    """Reads the score with the lowest time straight from the database"""
+    async with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+        await cursor.execute(BEST_SCORE_SQL, prepare=PREPARED_STATEMENTS)
+        row = await cursor.fetchone()
+        if row:
+            return dict(row)
+        return None
+
+
+async def get_best_score():
+    """Gets the score with the lowest time (best time), through score_cache"""
+    now = time_module.monotonic()
+    hit, best_score = score_cache.lookup(now)
+    if hit:
+        return best_score
+    return score_cache.store(await _fetch_best_score(), now)
+
+
+async def create_score(name, time, with_rank=False):
+    """Creates a new score (see db.create_score for with_rank)"""
+    async with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+        await cursor.execute(
+            CREATE_SCORE_WITH_RANK_SQL if with_rank else CREATE_SCORE_SQL,
+            (name, time),
+            prepare=PREPARED_STATEMENTS,
+        )
+        score = dict(await cursor.fetchone())
+
+    score_cache.record_score(score)
+    return score
+
+
+async def get_scores_page(limit=SCORES_PAGE_DEFAULT_LIMIT, after=None):
+    """Gets one page of scores; returns (scores, next_cursor) like db.get_scores_page"""
+    limit = max(1, min(int(limit), SCORES_PAGE_MAX_LIMIT))
+    after_key = decode_scores_cursor(after) if after else None
+
+    async with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+        if after_key:
+            await cursor.execute(
+                SCORES_PAGE_AFTER_SQL,
+                (*after_key, limit + 1),
+                prepare=PREPARED_STATEMENTS,
+            )
+        else:
+            await cursor.execute(
+                SCORES_PAGE_FIRST_SQL,
+                (limit + 1,),
+                prepare=PREPARED_STATEMENTS,
+            )
+
+        rows = [dict(row) for row in await cursor.fetchall()]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_scores_cursor(rows[-1])
+    return rows, next_cursor
+
+
+async def get_approved_messages_version():
+    """Gets the version counter of the approved messages list"""
+    async with get_db() as conn:
+        cursor = conn.cursor()
+        await cursor.execute(APPROVED_MESSAGES_VERSION_SQL, prepare=PREPARED_STATEMENTS)
+        row = await cursor.fetchone()
+        return row[0] if row else 0
+
+
+async def get_approved_messages():
+    """Gets only messages with 'Approved' status"""
+    async with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+        await cursor.execute(APPROVED_MESSAGES_SQL, prepare=PREPARED_STATEMENTS)
+
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+
+async def get_approved_messages_since(since=None, limit=MESSAGES_FEED_MAX_LIMIT):
+    """Gets messages approved after a cursor; returns (messages, cursor)"""
+    limit = max(1, min(int(limit), MESSAGES_FEED_MAX_LIMIT))
+    since_key = decode_messages_cursor(since) if since else None
+
+    async with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+        if since_key:
+            await cursor.execute(
+                MESSAGES_SINCE_SQL,
+                (*since_key, limit),
+                prepare=PREPARED_STATEMENTS,
+            )
+        else:
+            await cursor.execute(
+                MESSAGES_FEED_FIRST_SQL,
+                (limit,),
+                prepare=PREPARED_STATEMENTS,
+            )
+
+        rows = [dict(row) for row in await cursor.fetchall()]
+
+    next_cursor = encode_messages_cursor(rows[-1]) if rows else since
+    return rows, next_cursor
+
+
+async def create_message(name, message):
+    """Creates a new message with 'Pending' status"""
+    async with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+        await cursor.execute(
+            CREATE_MESSAGE_SQL, (name, message), prepare=PREPARED_STATEMENTS
+        )
+
+        row = await cursor.fetchone()
+        return dict(row)
+
+
+async def get_guest_by_uuid(guest_uuid):
+    """Gets a single guest by uuid (public lookup for the invitation page)"""
+    async with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+        await cursor.execute(
+            GUEST_BY_UUID_SQL, (guest_uuid,), prepare=PREPARED_STATEMENTS
+        )
+        row = await cursor.fetchone()
+        if row:
+            return dict(row)
+        return None
+
+
+async def update_guest_rsvp(guest_uuid, attending, allergies=None, companion_names=None):
+    """Updates a guest's RSVP response (public, via the invitation page)"""
+    async with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+
+        if companion_names is not None:
+            await cursor.execute(
+                UPDATE_RSVP_WITH_COMPANIONS_SQL,
+                (attending, allergies, companion_names, guest_uuid),
+                prepare=PREPARED_STATEMENTS,
+            )
+        else:
+            await cursor.execute(
+                UPDATE_RSVP_SQL,
+                (attending, allergies, guest_uuid),
+                prepare=PREPARED_STATEMENTS,
+            )
+
+        if cursor.rowcount == 0:
+            raise ValueError("Guest not found")
+
+        row = await cursor.fetchone()
+        return dict(row)
+
+
+async def get_all_guests():
+    """Gets all guests ordered by first name"""
+    async with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+        await cursor.execute(ALL_GUESTS_SQL, prepare=PREPARED_STATEMENTS)
+
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+
+async def iter_guests_for_links(only_pending=False):
+    """Streams the guests needed to build invitation links, ordered by id
+    (see db.iter_guests_for_links)"""
+    async with get_db() as conn:
+        async with conn.cursor(name="guests_for_links", row_factory=dict_row) as cursor:
+            cursor.itersize = GUEST_LINKS_BATCH_SIZE
+            await cursor.execute(GUESTS_FOR_LINKS_SQL, {"only_pending": only_pending})
+            async for row in cursor:
+                yield dict(row)
+
+
+async def mark_links_generated(guest_ids):
+    """Sets link_generated on the given guests with a single UPDATE.
+    Returns how many guests changed (already marked ones are not rewritten)."""
+    if not guest_ids:
+        return 0
+
+    async with get_db() as conn:
+        cursor = conn.cursor()
+        await cursor.execute(MARK_LINKS_GENERATED_SQL, (list(guest_ids),))
+        return cursor.rowcount
+
+
+async def create_guest(
+    first_name,
+    last_name=None,
+    nickname=None,
+    phone=None,
+    companion_names=None,
+    group_name=None,
+    attending=None,
+    allergies=None,
+    link_generated=False,
+    link_sent=False,
+):
+    """Creates a new guest"""
+    async with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+        await cursor.execute(
+            CREATE_GUEST_SQL,
+            (
+                first_name,
+                last_name,
+                nickname,
+                phone,
+                companion_names or [],
+                group_name,
+                attending,
+                allergies,
+                link_generated,
+                link_sent,
+            ),
+            prepare=PREPARED_STATEMENTS,
+        )
+
+        row = await cursor.fetchone()
+        return dict(row)
+
+
+async def update_guest(guest_id, **fields):
+    """Updates only the given columns of an existing guest (see db.update_guest)"""
+    columns, values = clean_guest_update(fields)
+
+    async with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+
+        if columns:
+            await cursor.execute(
+                update_guest_query(columns), values + [guest_id] + values
+            )
+            row = await cursor.fetchone()
+            if row:
+                return dict(row)
+
+        # Nothing to change (or nothing changed): return the current row
+        await cursor.execute(GUEST_BY_ID_SQL, (guest_id,), prepare=PREPARED_STATEMENTS)
+        row = await cursor.fetchone()
+        if row is None:
+            raise ValueError(f"Guest with id {guest_id} not found")
+        return dict(row)
+
+
+async def delete_guest(guest_id):
+    """Deletes a guest by ID"""
+    async with get_db() as conn:
+        cursor = conn.cursor()
+        await cursor.execute(DELETE_GUEST_SQL, (guest_id,), prepare=PREPARED_STATEMENTS)
+
+        if cursor.rowcount == 0:
+            raise ValueError(f"Guest with id {guest_id} not found")
+
+        return True
+
+
+async def get_all_messages():
+    """Gets all messages (for administration)"""
+    async with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+        await cursor.execute(ALL_MESSAGES_SQL, prepare=PREPARED_STATEMENTS)
+
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+
+async def get_pending_messages():
+    """Gets only messages with 'Pending' status"""
+    async with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+        await cursor.execute(PENDING_MESSAGES_SQL, prepare=PREPARED_STATEMENTS)
+
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+
+async def delete_message(message_id):
+    """Deletes a message by ID"""
+    async with get_db() as conn:
+        cursor = conn.cursor()
+        await cursor.execute(
+            DELETE_MESSAGE_SQL, (message_id,), prepare=PREPARED_STATEMENTS
+        )
+
+        if (await cursor.fetchone())[0] == 0:
+            raise ValueError(f"Message with id {message_id} not found")
+
+        return True
+
+
+async def update_message_status(message_id, status):
+    """Updates the status of a message (for administration)"""
+    if status not in MESSAGE_STATUSES:
+        raise ValueError(f"Status must be one of {MESSAGE_STATUSES}")
+
+    async with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+        await cursor.execute(
+            UPDATE_MESSAGE_STATUS_SQL,
+            {"id": message_id, "status": status},
+            prepare=PREPARED_STATEMENTS,
+        )
+
+        row = await cursor.fetchone()
+        if row is None:
+            raise ValueError(f"Message with id {message_id} not found")
+
+        return dict(row)
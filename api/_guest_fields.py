@@ -0,0 +1,66 @@
+"""
+Validation of guest fields in admin payloads, shared by the Vercel handlers
+(through _guests.py) and the Flask backend so both apply the same rules.
+"""
+
+TEXT_FIELDS = ("last_name", "nickname", "phone", "group_name", "allergies")
+FLAG_FIELDS = ("link_generated", "link_sent")
+FIELDS = ("first_name", *TEXT_FIELDS, "companion_names", "attending", *FLAG_FIELDS)
+
+
+class GuestFieldsError(ValueError):
+    """An invalid guest payload (the caller answers 400)"""
+
+
+def _text(name, value):
+    """A text field as a stripped string ("" for null). Phones exported as
+    JSON numbers are common, so an integer phone is accepted as its digits."""
+    if value is None:
+        return ""
+    if name == "phone" and isinstance(value, int) and not isinstance(value, bool):
+        return str(value)
+    if not isinstance(value, str):
+        raise GuestFieldsError(f"{name} must be a string")
+    return value.strip()
+
+
+def clean_guest_fields(data):
+    """Normalizes the guest fields present in a payload (absent fields stay absent).
+    Raises GuestFieldsError for invalid payloads, including unknown keys (a
+    misspelled field must not look like a successful no-op update)."""
+    if not isinstance(data, dict):
+        raise GuestFieldsError("Guest fields must be an object")
+
+    unknown = set(data) - set(FIELDS)
+    if unknown:
+        raise GuestFieldsError(f"Unknown guest fields: {', '.join(sorted(unknown))}")
+
+    fields = {}
+
+    if "first_name" in data:
+        first_name = _text("first_name", data.get("first_name"))
+        if not first_name:
+            raise GuestFieldsError("first_name cannot be empty")
+        fields["first_name"] = first_name
+
+    for name in TEXT_FIELDS:
+        if name in data:
+            fields[name] = _text(name, data.get(name)) or None
+
+    if "companion_names" in data:
+        companion_names = data.get("companion_names") or []
+        if not isinstance(companion_names, list) or not all(
+            name is None or isinstance(name, str) for name in companion_names
+        ):
+            raise GuestFieldsError("companion_names must be a list of strings")
+        fields["companion_names"] = [(name or "").strip() for name in companion_names]
+
+    if "attending" in data:
+        attending = data.get("attending")
+        fields["attending"] = attending if isinstance(attending, bool) else None
+
+    for name in FLAG_FIELDS:
+        if name in data:
+            fields[name] = bool(data.get(name))
+
+    return fields
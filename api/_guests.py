@@ -0,0 +1,32 @@
+"""
+Guest payload helpers shared by the admin guest endpoints.
+"""
+import _guest_fields as guest_fields
+from _handler import HTTPError
+
+
+def serialize_guest(guest):
+    return {
+        "id": guest["id"],
+        "uuid": str(guest["uuid"]),
+        "first_name": guest["first_name"],
+        "last_name": guest["last_name"],
+        "nickname": guest["nickname"],
+        "phone": guest["phone"],
+        "companion_names": guest["companion_names"] or [],
+        "group_name": guest["group_name"],
+        "attending": guest["attending"],
+        "allergies": guest["allergies"],
+        "link_generated": guest["link_generated"],
+        "link_sent": guest["link_sent"],
+        "created_at": str(guest["created_at"]),
+    }
+
+
+def clean_guest_fields(data):
+    """Normalizes the guest fields present in a payload (see _guest_fields.py);
+    invalid payloads are answered with 400"""
+    try:
+        return guest_fields.clean_guest_fields(data)
+    except guest_fields.GuestFieldsError as e:
+        raise HTTPError(400, str(e))
@@ -0,0 +1,292 @@
+"""
+Shared request handling for the Vercel BaseHTTPRequestHandler endpoints.
+
+Files starting with an underscore are not deployed as functions by Vercel,
+so this module is only ever imported by the endpoints under api/.
+
+Endpoints subclass JSONHandler and implement lowercase methods (get, post,
+put, patch, delete); OPTIONS/CORS, body parsing, JSON encoding and error
+serialization are handled here once.
+"""
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler
+import gzip
+import hashlib
+import json
+import threading
+import time
+import traceback
+import urllib.parse
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Maximum accepted request body (bytes); larger bodies get a 413
+MAX_BODY_BYTES = 64 * 1024
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_BYTES = 1024
+# Number of compressed bodies kept for responses that have not changed
+COMPRESSION_CACHE_SIZE = 32
+
+HANDLER_METHODS = ("get", "post", "put", "patch", "delete")
+
+# One shared encoder: compact output, datetimes/UUIDs/Decimals fall back to str()
+_json_encoder = json.JSONEncoder(default=str, separators=(",", ":"))
+
+
+def encode_json(payload):
+    """Serializes a payload to UTF-8 JSON bytes"""
+    return _json_encoder.encode(payload).encode("utf-8")
+
+
+def parse_accept_encoding(header):
+    """Returns the set of codings the client accepts (q > 0)"""
+    accepted = set()
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(coding)
+    return accepted
+
+
+def choose_encoding(accept_encoding):
+    """Picks the best supported content coding for an Accept-Encoding header"""
+    accepted = parse_accept_encoding(accept_encoding)
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+_compressed_cache = OrderedDict()
+_compressed_cache_lock = threading.Lock()
+
+
+def compress_body(body, encoding):
+    """Compresses a body, reusing the cached result when the body is unchanged"""
+    key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+    with _compressed_cache_lock:
+        cached = _compressed_cache.get(key)
+        if cached is not None:
+            _compressed_cache.move_to_end(key)
+            return cached
+
+    if encoding == "br":
+        compressed = brotli.compress(body, quality=5)
+    else:
+        compressed = gzip.compress(body, compresslevel=6, mtime=0)
+
+    with _compressed_cache_lock:
+        _compressed_cache[key] = compressed
+        while len(_compressed_cache) > COMPRESSION_CACHE_SIZE:
+            _compressed_cache.popitem(last=False)
+    return compressed
+
+
+class HTTPError(Exception):
+    """Raised by endpoints to return a JSON error with a given status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def extract_id(path, segment):
+    """Extracts the numeric id that follows `segment` in a request path.
+
+    Vercel dynamic routes may send the full path (/api/admin/messages/1),
+    a partial one (/1) or carry a query string, so fall back to the last
+    numeric segment and then to any positive numeric segment.
+    """
+    path_without_query = (path or "").split("?")[0]
+    path_parts = [p for p in path_without_query.strip("/").split("/") if p]
+
+    if segment in path_parts:
+        idx = path_parts.index(segment)
+        if idx + 1 < len(path_parts) and path_parts[idx + 1].isdigit():
+            return int(path_parts[idx + 1])
+
+    if path_parts and path_parts[-1].strip().isdigit():
+        return int(path_parts[-1].strip())
+
+    for part in reversed(path_parts):
+        if part.isdigit() and int(part) > 0:
+            return int(part)
+
+    return None
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    # Status used when the endpoint raises ValueError (db helpers raise it for
+    # "not found"); None means ValueError is treated as any other error (500)
+    value_error_status = None
+    # Largest request body this endpoint accepts
+    max_body_bytes = MAX_BODY_BYTES
+    # Negotiate gzip/brotli for large responses (enable on list endpoints)
+    compress_responses = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        methods = [m.upper() for m in HANDLER_METHODS if hasattr(cls, m)]
+        cls.allowed_methods = methods + ["OPTIONS"]
+        # Pre-encoded once per endpoint instead of three send_header calls per response
+        cls._cors_header_block = (
+            "Access-Control-Allow-Origin: *\r\n"
+            f"Access-Control-Allow-Methods: {', '.join(cls.allowed_methods)}\r\n"
+            "Access-Control-Allow-Headers: Content-Type\r\n"
+        ).encode("latin-1")
+
+    # --- request helpers -------------------------------------------------
+
+    @property
+    def query(self):
+        """Parsed query string as a dict of lists (blank values kept as "")"""
+        return urllib.parse.parse_qs(
+            urllib.parse.urlparse(self.path).query, keep_blank_values=True
+        )
+
+    def query_param(self, name, default=None):
+        """First value of a query string parameter; `default` when missing or blank"""
+        return (self.query.get(name) or [default])[0] or default
+
+    def read_body(self):
+        """Reads the raw request body, enforcing max_body_bytes"""
+        try:
+            content_length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if content_length > self.max_body_bytes:
+            raise HTTPError(413, "Request body too large")
+        return self.rfile.read(content_length) if content_length > 0 else b""
+
+    def read_json(self):
+        """Reads and decodes a JSON request body ({} when empty)"""
+        body = self.read_body()
+        if not body:
+            return {}
+        try:
+            return json.loads(body.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise HTTPError(400, "Invalid JSON body")
+
+    # --- response helpers ------------------------------------------------
+
+    def send_cors_headers(self):
+        self._headers_buffer.append(self._cors_header_block)
+
+    def send_json(self, status, payload, headers=None):
+        """Sends a JSON response with CORS headers (compressed when negotiated)"""
+        body = encode_json(payload)
+        encoding = None
+        if self.compress_responses and len(body) >= COMPRESSION_MIN_BYTES:
+            encoding = choose_encoding(self.headers.get("Accept-Encoding"))
+            if encoding:
+                body = compress_body(body, encoding)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if self.compress_responses:
+            self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_cors_headers()
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_timing_header()
+        self.end_headers()
+        self.wfile.write(body)
+
+    def etag_matches(self, etag):
+        """True when the request's If-None-Match already names this ETag"""
+        if_none_match = self.headers.get("If-None-Match")
+        if not if_none_match:
+            return False
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+    def send_not_modified(self, etag):
+        """Sends a 304 for a client that already has the current representation"""
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_cors_headers()
+        self.send_timing_header()
+        self.end_headers()
+
+    def send_error_json(self, status, message):
+        self.send_json(status, {"error": message})
+
+    def send_timing_header(self):
+        started = getattr(self, "_started_at", None)
+        if started is not None:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.send_header("Server-Timing", f"app;dur={elapsed_ms:.1f}")
+
+    # --- dispatch --------------------------------------------------------
+
+    def _dispatch(self, method):
+        self._started_at = time.perf_counter()
+        endpoint = getattr(self, method, None)
+        if endpoint is None:
+            self.send_error_json(405, "Method not allowed")
+            return
+
+        try:
+            endpoint()
+        except HTTPError as e:
+            self.send_error_json(e.status, e.message)
+        except ValueError as e:
+            if self.value_error_status is None:
+                self._send_exception(e)
+            else:
+                self.send_error_json(self.value_error_status, str(e))
+        except Exception as e:
+            self._send_exception(e)
+
+    def _send_exception(self, error):
+        self.send_json(
+            500,
+            {
+                "error": str(error),
+                "type": type(error).__name__,
+                "traceback": traceback.format_exc(),
+            },
+        )
+
+    def do_GET(self):
+        self._dispatch("get")
+
+    def do_POST(self):
+        self._dispatch("post")
+
+    def do_PUT(self):
+        self._dispatch("put")
+
+    def do_PATCH(self):
+        self._dispatch("patch")
+
+    def do_DELETE(self):
+        self._dispatch("delete")
+
+    def do_OPTIONS(self):
+        self._started_at = time.perf_counter()
+        self.send_response(200)
+        self.send_cors_headers()
+        self.send_header("Content-Length", "0")
+        self.end_headers()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Script to bulk import guests from a CSV into Supabase PostgreSQL
+(or into the local SQLite database with STORAGE_ENGINE=sqlite)
+Uses the same column detection as save the date/save_the_date.py and loads
+the whole list in a single transaction (COPY on PostgreSQL)
+Usage: python _import_guests.py "../save the date/input.csv"
+"""
+import os
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(PROJECT_DIR, "save the date"))
+from _storage import bulk_create_guests
+from save_the_date import leer_invitados_csv
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python _import_guests.py <guests.csv>")
+        sys.exit(1)
+
+    try:
+        with open(sys.argv[1], newline="", encoding="utf-8-sig") as infile:
+            guests = leer_invitados_csv(infile)
+        print(f"Importing {len(guests)} guests...")
+        created = bulk_create_guests(guests)
+        print(f"✅ Imported {len(created)} guests")
+    except Exception as e:
+        print(f"❌ Error importing guests: {e}")
+        import traceback
+
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,97 @@
+"""
+In-process cache for the best score (hot read path of /api/scores/best).
+
+Engine-independent: the Postgres (db.py, _db_async.py) and SQLite
+(backend/database.py) storage engines all read and write through it.
+"""
+import os
+import threading
+import time
+
+BEST_SCORE_CACHE_TTL = float(os.environ.get("BEST_SCORE_CACHE_TTL", "30"))
+
+_cache = {
+    "value": None,
+    "expires_at": 0.0,
+    "hits": 0,
+    "misses": 0,
+    # Best score recorded by record_score() and when, so a load that started
+    # before it was committed does not cache the older best
+    "recorded": None,
+    "recorded_at": 0.0,
+}
+_lock = threading.Lock()
+
+
+def lookup(now):
+    """Returns (hit, best_score) from the cache, counting the hit or miss"""
+    with _lock:
+        if now < _cache["expires_at"]:
+            _cache["hits"] += 1
+            value = _cache["value"]
+            return True, dict(value) if value else None
+        _cache["misses"] += 1
+        return False, None
+
+
+def _better(score, other):
+    return other is None or (score is not None and score["time"] < other["time"])
+
+
+def store(best_score, now):
+    """Caches a best score loaded from the database at `now`.
+
+    A score recorded since `now` may have been committed after the load
+    read the table; the better of the two is cached.
+    """
+    with _lock:
+        recorded = _cache["recorded"]
+        if _cache["recorded_at"] >= now and _better(recorded, best_score):
+            best_score = recorded
+        _cache["value"] = best_score
+        _cache["expires_at"] = now + BEST_SCORE_CACHE_TTL
+    return dict(best_score) if best_score else None
+
+
+def get_or_load(fetch):
+    """Returns the cached best score, calling fetch() to load it on a miss"""
+    now = time.monotonic()
+    hit, best_score = lookup(now)
+    if hit:
+        return best_score
+    return store(fetch(), now)
+
+
+def record_score(score):
+    """Write-through: replaces the cached best score if the new one beats it.
+
+    Call it after the score is committed. While nothing valid is cached the
+    score is still recorded, for a load that may be in flight (see store).
+    """
+    best = {
+        "name": score["name"],
+        "time": score["time"],
+        "created_at": score["created_at"],
+    }
+    with _lock:
+        now = time.monotonic()
+        if _better(best, _cache["recorded"]):
+            _cache["recorded"] = best
+            _cache["recorded_at"] = now
+        if now < _cache["expires_at"] and _better(best, _cache["value"]):
+            _cache["value"] = best
+
+
+def stats():
+    """Returns the hit/miss counters of the cache"""
+    with _lock:
+        return {"hits": _cache["hits"], "misses": _cache["misses"]}
+
+
+def invalidate():
+    """Drops the cached best score so the next read goes to the database"""
+    with _lock:
+        _cache["value"] = None
+        _cache["expires_at"] = 0.0
+        _cache["recorded"] = None
+        _cache["recorded_at"] = 0.0
@@ -0,0 +1,91 @@
+"""
+Storage interface shared by the Vercel handlers (api/) and the Flask backend.
+
+Both engines implement the same functions with the same arguments and return
+shapes:
+
+- postgres: api/db.py (Supabase), used on Vercel
+- sqlite:   backend/database.py, a single-file local/on-prem stand-in
+
+The engine is chosen with STORAGE_ENGINE=postgres|sqlite and defaults to
+postgres, the Vercel engine; there is no fallback, so missing Supabase settings
+fail loudly instead of switching databases. The Flask backend (backend/app.py)
+selects sqlite itself before importing this module.
+Import the functions from here (`from _storage import get_best_score`) instead
+of from an engine module.
+"""
+import importlib
+import os
+import sys
+
+ENGINES = ("postgres", "sqlite")
+
+# Directory of the SQLite engine (not part of the Vercel bundle; only
+# imported when selected)
+BACKEND_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"
+)
+
+
+def load_engine(name):
+    """Imports and returns the module implementing the given engine"""
+    if name == "postgres":
+        return importlib.import_module("db")
+    if name == "sqlite":
+        if BACKEND_DIR not in sys.path:
+            sys.path.append(BACKEND_DIR)
+        return importlib.import_module("database")
+    raise ValueError(f"STORAGE_ENGINE must be one of {ENGINES}")
+
+
+STORAGE_ENGINE = (os.environ.get("STORAGE_ENGINE") or "postgres").lower()
+engine = load_engine(STORAGE_ENGINE)
+
+init_db = engine.init_db
+get_schema_version = engine.get_schema_version
+
+# Closes the connections this process holds (e.g. in a server master before
+# forking workers); they are reopened on next use
+if STORAGE_ENGINE == "postgres":
+    close_db = engine.close_pool
+else:
+    close_db = engine.close_db_connection
+
+# Request timing: database time spent by the calling thread
+reset_db_stats = engine.reset_db_stats
+get_db_stats = engine.get_db_stats
+
+# Scores
+SCORES_PAGE_DEFAULT_LIMIT = engine.SCORES_PAGE_DEFAULT_LIMIT
+SCORES_PAGE_MAX_LIMIT = engine.SCORES_PAGE_MAX_LIMIT
+get_best_score = engine.get_best_score
+get_best_score_cache_stats = engine.get_best_score_cache_stats
+invalidate_best_score_cache = engine.invalidate_best_score_cache
+create_score = engine.create_score
+get_scores_page = engine.get_scores_page
+
+# Messages
+MESSAGE_STATUSES = engine.MESSAGE_STATUSES
+MESSAGES_FEED_MAX_LIMIT = engine.MESSAGES_FEED_MAX_LIMIT
+get_approved_messages = engine.get_approved_messages
+get_approved_messages_version = engine.get_approved_messages_version
+get_approved_messages_since = engine.get_approved_messages_since
+latest_messages_cursor = engine.latest_messages_cursor
+create_message = engine.create_message
+get_all_messages = engine.get_all_messages
+get_pending_messages = engine.get_pending_messages
+update_message_status = engine.update_message_status
+delete_message = engine.delete_message
+
+# Guests
+GUEST_UPDATABLE_COLUMNS = engine.GUEST_UPDATABLE_COLUMNS
+get_guest_by_uuid = engine.get_guest_by_uuid
+update_guest_rsvp = engine.update_guest_rsvp
+get_all_guests = engine.get_all_guests
+create_guest = engine.create_guest
+bulk_create_guests = engine.bulk_create_guests
+update_guest = engine.update_guest
+bulk_update_guests = engine.bulk_update_guests
+delete_guest = engine.delete_guest
+iter_guests_for_links = engine.iter_guests_for_links
+mark_links_generated = engine.mark_links_generated
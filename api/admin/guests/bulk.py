@@ -0,0 +1,88 @@
+import io
+import sys
+import os
+
+# Add parent directory to path to import shared modules
+API_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(API_DIR)
+# save_the_date.py holds the CSV column detection shared with the link generator
+sys.path.append(os.path.join(os.path.dirname(API_DIR), "save the date"))
+from _handler import JSONHandler, HTTPError
+from _guests import serialize_guest, clean_guest_fields
+from _storage import bulk_create_guests, bulk_update_guests
+from save_the_date import leer_invitados_csv
+
+MAX_IMPORT_GUESTS = 5000
+MAX_BATCH_UPDATES = 1000
+
+
+def clean_guest(data, position):
+    """Validates and normalizes one guest of a JSON import"""
+    if not isinstance(data, dict):
+        raise HTTPError(400, f"Guest #{position + 1} must be an object")
+    if not (data.get("first_name") or "").strip():
+        raise HTTPError(400, f"Guest #{position + 1}: first_name is required")
+    try:
+        return clean_guest_fields(data)
+    except HTTPError as e:
+        raise HTTPError(400, f"Guest #{position + 1}: {e.message}")
+
+
+class handler(JSONHandler):
+    max_body_bytes = 2 * 1024 * 1024
+    compress_responses = True
+
+    def post(self):
+        """Bulk import: a JSON array of guests, or a guest CSV (Content-Type: text/csv)"""
+        content_type = (self.headers.get("Content-Type") or "").lower()
+
+        if content_type.startswith("text/csv"):
+            try:
+                text = self.read_body().decode("utf-8-sig")
+            except UnicodeDecodeError:
+                raise HTTPError(400, "CSV must be UTF-8 encoded")
+            guests = leer_invitados_csv(io.StringIO(text, newline=""))
+        else:
+            data = self.read_json()
+            if not isinstance(data, list):
+                raise HTTPError(400, "Expected a JSON array of guests")
+            guests = [clean_guest(guest, i) for i, guest in enumerate(data)]
+
+        if not guests:
+            raise HTTPError(400, "No guests provided")
+        if len(guests) > MAX_IMPORT_GUESTS:
+            raise HTTPError(400, f"At most {MAX_IMPORT_GUESTS} guests per import")
+
+        created = bulk_create_guests(guests)
+        self.send_json(
+            201,
+            {"imported": len(created), "guests": [serialize_guest(g) for g in created]},
+        )
+
+    def patch(self):
+        """Batch partial update: [{"id": 1, "fields": {"link_sent": true}}, ...]"""
+        data = self.read_json()
+        if not isinstance(data, list) or not data:
+            raise HTTPError(400, "Expected a non-empty JSON array of updates")
+        if len(data) > MAX_BATCH_UPDATES:
+            raise HTTPError(400, f"At most {MAX_BATCH_UPDATES} updates per request")
+
+        updates = []
+        for position, item in enumerate(data):
+            guest_id = item.get("id") if isinstance(item, dict) else None
+            if not isinstance(guest_id, int) or isinstance(guest_id, bool):
+                raise HTTPError(400, f"Update #{position + 1}: integer id is required")
+            updates.append((guest_id, clean_guest_fields(item.get("fields") or {})))
+
+        try:
+            updated, missing_ids = bulk_update_guests(updates)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+
+        self.send_json(
+            200,
+            {
+                "updated": [serialize_guest(g) for g in updated],
+                "not_found": missing_ids,
+            },
+        )
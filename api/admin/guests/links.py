@@ -0,0 +1,39 @@
+import sys
+import os
+
+# Add parent directory to path to import shared modules
+API_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(API_DIR)
+# save_the_date.py builds the invitation links (same message as the Manager page)
+sys.path.append(os.path.join(os.path.dirname(API_DIR), "save the date"))
+from _handler import JSONHandler, HTTPError
+from _storage import iter_guests_for_links, mark_links_generated
+from save_the_date import URL_SITIO, enlaces_invitados
+
+
+class handler(JSONHandler):
+    compress_responses = True
+
+    def post(self):
+        """Generates the invitation links of all guests (or only those without
+        link_generated) and marks them with a single UPDATE:
+        {"only_pending": true, "base_url": "https://..."}"""
+        data = self.read_json()
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Expected a JSON object")
+
+        base_url = data.get("base_url") or URL_SITIO
+        if not isinstance(base_url, str) or not base_url.startswith(
+            ("http://", "https://")
+        ):
+            raise HTTPError(400, "base_url must be an http(s) URL")
+
+        links = list(
+            enlaces_invitados(
+                iter_guests_for_links(only_pending=bool(data.get("only_pending"))),
+                base_url,
+            )
+        )
+
+        marked = mark_links_generated([link["id"] for link in links])
+        self.send_json(200, {"generated": len(links), "marked": marked, "links": links})
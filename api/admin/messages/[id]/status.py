@@ -1,115 +1,40 @@
-from http.server import BaseHTTPRequestHandler
-import json
 import sys
 import os
-import urllib.parse
 
-# Add parent directory to path to import db module
+# Add parent directory to path to import shared modules
 sys.path.append(
     os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 )
-from db import update_message_status
+from _handler import JSONHandler, HTTPError, extract_id
+from _storage import update_message_status
 
+VALID_STATUSES = ["Pending", "Approved", "Denied"]
 
-class handler(BaseHTTPRequestHandler):
-    def do_PUT(self):
-        try:
-            # Extract message_id from path (strip query string)
-            path_without_query = (self.path or "").split("?")[0]
-            path_parts = [p for p in path_without_query.strip("/").split("/") if p]
-            message_id = None
 
-            # Find the index of 'messages' and get the next part as ID
-            if "messages" in path_parts:
-                msg_index = path_parts.index("messages")
-                if msg_index + 1 < len(path_parts):
-                    try:
-                        message_id = int(path_parts[msg_index + 1])
-                    except (ValueError, IndexError):
-                        pass
+class handler(JSONHandler):
+    value_error_status = 404
 
-            # Fallback: last path segment as ID (e.g. Vercel dynamic route sends "/1" or "1")
-            if message_id is None and path_parts:
-                last_part = (path_parts[-1] or "").split("?")[0].strip()
-                if last_part.isdigit():
-                    message_id = int(last_part)
+    def put(self):
+        message_id = extract_id(self.path, "messages")
+        if message_id is None:
+            raise HTTPError(400, "Message ID is required")
 
-            if message_id is None:
-                self.send_response(400)
-                self.send_header("Content-Type", "application/json")
-                self.send_header("Access-Control-Allow-Origin", "*")
-                self.end_headers()
-                self.wfile.write(
-                    json.dumps({"error": "Message ID is required"}).encode()
-                )
-                return
+        data = self.read_json()
+        status = data.get("status")
 
-            content_length = int(self.headers.get("Content-Length", 0))
-            body = self.rfile.read(content_length)
-            data = json.loads(body.decode("utf-8"))
+        if not status:
+            raise HTTPError(400, "Status is required")
 
-            status = data.get("status")
+        if status not in VALID_STATUSES:
+            raise HTTPError(400, f"Status must be one of {VALID_STATUSES}")
 
-            if not status:
-                self.send_response(400)
-                self.send_header("Content-Type", "application/json")
-                self.send_header("Access-Control-Allow-Origin", "*")
-                self.end_headers()
-                self.wfile.write(json.dumps({"error": "Status is required"}).encode())
-                return
+        updated_message = update_message_status(message_id, status)
+        response = {
+            "id": updated_message["id"],
+            "name": updated_message["name"],
+            "message": updated_message["message"],
+            "status": updated_message["status"],
+            "created_at": str(updated_message["created_at"]),
+        }
 
-            valid_statuses = ["Pending", "Approved", "Denied"]
-            if status not in valid_statuses:
-                self.send_response(400)
-                self.send_header("Content-Type", "application/json")
-                self.send_header("Access-Control-Allow-Origin", "*")
-                self.end_headers()
-                self.wfile.write(
-                    json.dumps(
-                        {"error": f"Status must be one of {valid_statuses}"}
-                    ).encode()
-                )
-                return
-
-            updated_message = update_message_status(message_id, status)
-            response = {
-                "id": updated_message["id"],
-                "name": updated_message["name"],
-                "message": updated_message["message"],
-                "status": updated_message["status"],
-                "created_at": str(updated_message["created_at"]),
-            }
-
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.send_header("Access-Control-Allow-Methods", "PUT, OPTIONS")
-            self.send_header("Access-Control-Allow-Headers", "Content-Type")
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
-        except ValueError as e:
-            self.send_response(404)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": str(e)}).encode())
-        except Exception as e:
-            import traceback
-
-            self.send_response(500)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            error_info = {
-                "error": str(e),
-                "type": type(e).__name__,
-                "traceback": traceback.format_exc(),
-            }
-            self.wfile.write(json.dumps(error_info, indent=2).encode())
-
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "PUT, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
-        self.end_headers()
+        self.send_json(200, response)
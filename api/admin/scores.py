@@ -1,19 +1,27 @@
-from http.server import BaseHTTPRequestHandler
-import json
 import sys
 import os
 
-# Add parent directory to path to import db module
+# Add parent directory to path to import shared modules
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from db import get_all_scores
+from _handler import JSONHandler, HTTPError
+from _storage import get_scores_page, SCORES_PAGE_DEFAULT_LIMIT
 
 
-class handler(BaseHTTPRequestHandler):
-    def do_GET(self):
+class handler(JSONHandler):
+    compress_responses = True
+
+    def get(self):
         try:
-            scores = get_all_scores()
-            # Convert datetime objects to strings
-            response = [
+            limit = int(self.query_param("limit", SCORES_PAGE_DEFAULT_LIMIT))
+            scores, next_cursor = get_scores_page(
+                limit=limit, after=self.query_param("after")
+            )
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+
+        # Convert datetime objects to strings
+        response = {
+            "scores": [
                 {
                     "id": score["id"],
                     "name": score["name"],
@@ -21,32 +29,8 @@ class handler(BaseHTTPRequestHandler):
                     "created_at": str(score["created_at"]),
                 }
                 for score in scores
-            ]
-
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS")
-            self.send_header("Access-Control-Allow-Headers", "Content-Type")
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
-        except Exception as e:
-            import traceback
-
-            self.send_response(500)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            error_info = {
-                "error": str(e),
-                "type": type(e).__name__,
-                "traceback": traceback.format_exc(),
-            }
-            self.wfile.write(json.dumps(error_info, indent=2).encode())
+            ],
+            "next_cursor": next_cursor,
+        }
 
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
-        self.end_headers()
+        self.send_json(200, response)
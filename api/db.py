@@ -1,19 +1,58 @@
+import base64
+import json
 import os
+import threading
+import time as time_module
 import psycopg
+from psycopg import sql
 from psycopg.rows import dict_row
 from contextlib import contextmanager
-
-
-# Supabase PostgreSQL connection
-def get_db_connection():
-    """Get PostgreSQL connection from Supabase"""
+from datetime import datetime
+
+import _score_cache as score_cache
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:  # pool extra not installed: fall back to one-shot connections
+    ConnectionPool = None
+
+
+# Pool settings (can be tuned per deployment through environment variables)
+POOL_ENABLED = os.environ.get("DB_POOL_ENABLED", "true").lower() not in (
+    "0",
+    "false",
+    "no",
+)
+POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "5"))
+POOL_MAX_IDLE = float(os.environ.get("DB_POOL_MAX_IDLE", "300"))
+POOL_MAX_LIFETIME = float(os.environ.get("DB_POOL_MAX_LIFETIME", "1800"))
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))
+
+# Server-side prepared statements for hot lookups. The Supabase pooler
+# (Supavisor) supports them in transaction mode; set DB_PREPARED_STATEMENTS=false
+# behind a pooler that does not (e.g. PgBouncer < 1.21).
+PREPARED_STATEMENTS = os.environ.get("DB_PREPARED_STATEMENTS", "true").lower() not in (
+    "0",
+    "false",
+    "no",
+)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Per-thread database time, for request timing (see get_db_stats)
+_stats = threading.local()
+
+
+def get_connection_string():
+    """Builds the PostgreSQL connection string for Supabase"""
     # Check if full connection string is provided (preferred for pooler)
     conn_string = os.environ.get("SUPABASE_DB_CONNECTION_STRING")
 
     if conn_string:
         # Use full connection string if provided (should include pooler hostname)
-        conn = psycopg.connect(conn_string)
-        return conn
+        return conn_string
 
     # Otherwise, construct connection string
     host = os.environ.get("SUPABASE_DB_HOST")
@@ -53,15 +92,82 @@ def get_db_connection():
     port = "6543"
 
     # Use connection string format with pooler hostname and user
-    conn_string = f"host={pooler_host} dbname={dbname} user={pooler_user} password={password} port={port} sslmode=require"
+    return f"host={pooler_host} dbname={dbname} user={pooler_user} password={password} port={port} sslmode=require"
+
+
+# Supabase PostgreSQL connection
+def get_connection_kwargs():
+    """Extra psycopg.connect() arguments shared by pooled and one-shot connections"""
+    if PREPARED_STATEMENTS:
+        return {}
+    # Never prepare, not even automatically after repeated executions
+    return {"prepare_threshold": None}
+
+
+def get_db_connection():
+    """Get a new (unpooled) PostgreSQL connection from Supabase"""
+    return psycopg.connect(get_connection_string(), **get_connection_kwargs())
+
+
+def get_pool():
+    """Returns the process-wide connection pool, creating it on first use.
+
+    Returns None when pooling is disabled (DB_POOL_ENABLED=false) or the
+    psycopg_pool package is not available.
+    """
+    global _pool
+    if not POOL_ENABLED or ConnectionPool is None:
+        return None
 
-    conn = psycopg.connect(conn_string)
-    return conn
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    get_connection_string(),
+                    kwargs=get_connection_kwargs(),
+                    min_size=POOL_MIN_SIZE,
+                    max_size=POOL_MAX_SIZE,
+                    max_idle=POOL_MAX_IDLE,
+                    max_lifetime=POOL_MAX_LIFETIME,
+                    timeout=POOL_TIMEOUT,
+                    # Health check on checkout: drops connections the pooler closed
+                    check=ConnectionPool.check_connection,
+                    name="wedding-db",
+                    open=True,
+                )
+    return _pool
+
+
+def close_pool():
+    """Closes the process-wide connection pool (if any)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def reset_db_stats():
+    """Starts a new measurement of database time for the calling thread"""
+    _stats.seconds = 0.0
+    _stats.calls = 0
+
+
+def get_db_stats():
+    """Returns (seconds, calls) spent in get_db() blocks by this thread since
+    the last reset_db_stats()"""
+    return getattr(_stats, "seconds", 0.0), getattr(_stats, "calls", 0)
 
 
 @contextmanager
-def get_db():
-    """Context manager to handle database connections"""
+def _borrow_connection():
+    pool = get_pool()
+    if pool is not None:
+        # The pool commits on success and rolls back on error
+        with pool.connection() as conn:
+            yield conn
+        return
+
     conn = get_db_connection()
     try:
         yield conn
@@ -73,13 +179,29 @@ def get_db():
         conn.close()
 
 
-def init_db():
-    """Initializes the database and creates tables if they don't exist"""
-    with get_db() as conn:
-        cursor = conn.cursor()
+@contextmanager
+def get_db():
+    """Context manager to handle database connections.
 
-        # Scores table
-        cursor.execute(
+    Borrows a connection from the pool and returns it at the end of the block;
+    falls back to a one-shot connection when pooling is disabled.
+    """
+    started = time_module.perf_counter()
+    try:
+        with _borrow_connection() as conn:
+            yield conn
+    finally:
+        _stats.seconds = getattr(_stats, "seconds", 0.0) + time_module.perf_counter() - started
+        _stats.calls = getattr(_stats, "calls", 0) + 1
+
+
+# Ordered schema migrations: (version, description, statements).
+# Never edit an applied step; append a new one instead.
+MIGRATIONS = [
+    (
+        1,
+        "base schema: scores, messages, guests",
+        [
             """
             CREATE TABLE IF NOT EXISTS scores (
                 id SERIAL PRIMARY KEY,
@@ -87,11 +209,7 @@ def init_db():
                 time INTEGER NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        """
-        )
-
-        # Messages table
-        cursor.execute(
+            """,
             """
             CREATE TABLE IF NOT EXISTS messages (
                 id SERIAL PRIMARY KEY,
@@ -100,11 +218,7 @@ def init_db():
                 status TEXT NOT NULL DEFAULT 'Pending',
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        """
-        )
-
-        # Guests table
-        cursor.execute(
+            """,
             """
             CREATE TABLE IF NOT EXISTS guests (
                 id SERIAL PRIMARY KEY,
@@ -121,127 +235,419 @@ def init_db():
                 link_sent BOOLEAN NOT NULL DEFAULT FALSE,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        """
-        )
-        cursor.execute(
-            "ALTER TABLE guests ADD COLUMN IF NOT EXISTS companion_names TEXT[] NOT NULL DEFAULT '{}'"
-        )
-        cursor.execute(
-            "ALTER TABLE guests ADD COLUMN IF NOT EXISTS group_name TEXT"
-        )
-        cursor.execute(
-            "ALTER TABLE guests ADD COLUMN IF NOT EXISTS uuid UUID NOT NULL DEFAULT gen_random_uuid()"
-        )
-        cursor.execute("ALTER TABLE guests ADD COLUMN IF NOT EXISTS attending BOOLEAN")
-        cursor.execute("ALTER TABLE guests ADD COLUMN IF NOT EXISTS allergies TEXT")
+            """,
+            # Columns added after the first deploy (no-ops on fresh databases)
+            "ALTER TABLE guests ADD COLUMN IF NOT EXISTS companion_names TEXT[] NOT NULL DEFAULT '{}'",
+            "ALTER TABLE guests ADD COLUMN IF NOT EXISTS group_name TEXT",
+            "ALTER TABLE guests ADD COLUMN IF NOT EXISTS uuid UUID NOT NULL DEFAULT gen_random_uuid()",
+            "ALTER TABLE guests ADD COLUMN IF NOT EXISTS attending BOOLEAN",
+            "ALTER TABLE guests ADD COLUMN IF NOT EXISTS allergies TEXT",
+            # Indexes to improve performance
+            "CREATE INDEX IF NOT EXISTS idx_scores_time ON scores(time ASC)",
+            "CREATE INDEX IF NOT EXISTS idx_messages_status ON messages(status)",
+            "CREATE INDEX IF NOT EXISTS idx_messages_created ON messages(created_at DESC)",
+        ],
+    ),
+    (
+        2,
+        "keyset pagination index for the admin ranking",
+        [
+            "CREATE INDEX IF NOT EXISTS idx_scores_time_created_id "
+            "ON scores(time ASC, created_at ASC, id ASC)",
+        ],
+    ),
+    (
+        3,
+        "content version counters for ETags",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS content_versions (
+                name TEXT PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 0
+            )
+            """,
+            "INSERT INTO content_versions (name) VALUES ('approved_messages') "
+            "ON CONFLICT (name) DO NOTHING",
+        ],
+    ),
+    (
+        4,
+        "approved_at for the incremental message wall feed",
+        [
+            "ALTER TABLE messages ADD COLUMN IF NOT EXISTS approved_at TIMESTAMP",
+            "UPDATE messages SET approved_at = created_at "
+            "WHERE status = 'Approved' AND approved_at IS NULL",
+            "CREATE INDEX IF NOT EXISTS idx_messages_approved_at "
+            "ON messages(approved_at, id) WHERE status = 'Approved'",
+        ],
+    ),
+    (
+        5,
+        "unique index on guests.uuid for invitation lookups",
+        [
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_guests_uuid ON guests(uuid)",
+        ],
+    ),
+]
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent cold starts migrate once
+MIGRATIONS_LOCK_KEY = 7_341_205
+
+
+def get_schema_version(conn):
+    """Returns the latest applied migration version (0 if none)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    except psycopg.errors.UndefinedTable:
+        conn.rollback()
+        return 0
+    return cursor.fetchone()[0]
 
-        # Indexes to improve performance
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_scores_time ON scores(time ASC)")
-        cursor.execute(
-            "CREATE INDEX IF NOT EXISTS idx_messages_status ON messages(status)"
-        )
-        cursor.execute(
-            "CREATE INDEX IF NOT EXISTS idx_messages_created ON messages(created_at DESC)"
-        )
 
+def init_db():
+    """Brings the database schema up to date by applying pending migrations.
+
+    When the schema is current this is a single SELECT on schema_version; DDL
+    (and its table locks) only runs for steps that were never applied.
+    Returns the list of versions applied by this call.
+    """
+    latest = MIGRATIONS[-1][0]
 
-def get_best_score():
-    """Gets the score with the lowest time (best time)"""
     with get_db() as conn:
-        cursor = conn.cursor(row_factory=dict_row)
+        if get_schema_version(conn) >= latest:
+            return []
+
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATIONS_LOCK_KEY,))
         cursor.execute(
             """
-            SELECT name, time, created_at
-            FROM scores
-            ORDER BY time ASC
-            LIMIT 1
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
         """
         )
+
+        # Re-read under the lock: another instance may have migrated meanwhile
+        current = get_schema_version(conn)
+        applied = []
+        for version, description, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                (version, description),
+            )
+            applied.append(version)
+
+        return applied
+
+
+BEST_SCORE_SQL = """
+    SELECT name, time, created_at
+    FROM scores
+    ORDER BY time ASC
+    LIMIT 1
+"""
+
+
+def _fetch_best_score():
+    """Reads the score with the lowest time straight from the database"""
+    with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+        cursor.execute(BEST_SCORE_SQL, prepare=PREPARED_STATEMENTS)
         row = cursor.fetchone()
         if row:
             return dict(row)
         return None
 
 
-def create_score(name, time):
-    """Creates a new score"""
+def get_best_score():
+    """Gets the score with the lowest time (best time), cached for BEST_SCORE_CACHE_TTL seconds"""
+    return score_cache.get_or_load(_fetch_best_score)
+
+
+def get_best_score_cache_stats():
+    """Returns the hit/miss counters of the best score cache"""
+    return score_cache.stats()
+
+
+def invalidate_best_score_cache():
+    """Drops the cached best score so the next read goes to the database"""
+    score_cache.invalidate()
+
+
+# The CTE's row is not visible to the subqueries, hence the + 1s
+CREATE_SCORE_WITH_RANK_SQL = """
+    WITH inserted AS (
+        INSERT INTO scores (name, time)
+        VALUES (%s, %s)
+        RETURNING id, name, time, created_at
+    )
+    SELECT inserted.id, inserted.name, inserted.time, inserted.created_at,
+           (SELECT COUNT(*) FROM scores WHERE time < inserted.time) + 1 AS rank,
+           (SELECT COUNT(*) FROM scores) + 1 AS total_plays
+    FROM inserted
+"""
+
+CREATE_SCORE_SQL = """
+    INSERT INTO scores (name, time)
+    VALUES (%s, %s)
+    RETURNING id, name, time, created_at
+"""
+
+
+def create_score(name, time, with_rank=False):
+    """Creates a new score.
+
+    With with_rank=True the result also includes the player's rank (1 = best,
+    ties share a rank) and the total number of plays, computed in the same
+    round-trip with counts over idx_scores_time.
+    """
     with get_db() as conn:
         cursor = conn.cursor(row_factory=dict_row)
-        cursor.execute(
-            """
-            INSERT INTO scores (name, time)
-            VALUES (%s, %s)
-            RETURNING id, name, time, created_at
-        """,
-            (name, time),
-        )
+        if with_rank:
+            cursor.execute(
+                CREATE_SCORE_WITH_RANK_SQL,
+                (name, time),
+                prepare=PREPARED_STATEMENTS,
+            )
+        else:
+            cursor.execute(CREATE_SCORE_SQL, (name, time), prepare=PREPARED_STATEMENTS)
 
         row = cursor.fetchone()
-        return dict(row)
+        score = dict(row)
+
+    score_cache.record_score(score)
+    return score
+
 
+SCORES_PAGE_DEFAULT_LIMIT = 50
+SCORES_PAGE_MAX_LIMIT = 500
+
+
+def encode_scores_cursor(score):
+    """Encodes the keyset (time, created_at, id) of a score as an opaque token"""
+    key = [score["time"], score["created_at"].isoformat(), score["id"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_scores_cursor(token):
+    """Decodes a token produced by encode_scores_cursor()"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        time, created_at, score_id = json.loads(base64.urlsafe_b64decode(padded))
+        return int(time), datetime.fromisoformat(created_at), int(score_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+SCORES_PAGE_AFTER_SQL = """
+    SELECT id, name, time, created_at
+    FROM scores
+    WHERE (time, created_at, id) > (%s, %s, %s)
+    ORDER BY time ASC, created_at ASC, id ASC
+    LIMIT %s
+"""
+
+SCORES_PAGE_FIRST_SQL = """
+    SELECT id, name, time, created_at
+    FROM scores
+    ORDER BY time ASC, created_at ASC, id ASC
+    LIMIT %s
+"""
+
+
+def get_scores_page(limit=SCORES_PAGE_DEFAULT_LIMIT, after=None):
+    """Gets one page of scores ordered by time (best first) for ranking.
+
+    Uses keyset pagination on (time, created_at, id) so each page is an index
+    range scan on idx_scores_time_created_id regardless of table size.
+    Returns (scores, next_cursor); next_cursor is None on the last page.
+    """
+    limit = max(1, min(int(limit), SCORES_PAGE_MAX_LIMIT))
+    after_key = decode_scores_cursor(after) if after else None
 
-def get_all_scores():
-    """Gets all scores ordered by time (best first) for ranking"""
     with get_db() as conn:
         cursor = conn.cursor(row_factory=dict_row)
-        cursor.execute(
-            """
-            SELECT id, name, time, created_at
-            FROM scores
-            ORDER BY time ASC, created_at ASC
-        """
-        )
+        if after_key:
+            cursor.execute(
+                SCORES_PAGE_AFTER_SQL,
+                (*after_key, limit + 1),
+                prepare=PREPARED_STATEMENTS,
+            )
+        else:
+            cursor.execute(
+                SCORES_PAGE_FIRST_SQL,
+                (limit + 1,),
+                prepare=PREPARED_STATEMENTS,
+            )
 
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+        rows = [dict(row) for row in cursor.fetchall()]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_scores_cursor(rows[-1])
+    return rows, next_cursor
+
+
+APPROVED_MESSAGES_VERSION_SQL = """
+    SELECT version FROM content_versions WHERE name = 'approved_messages'
+"""
+
+
+def get_approved_messages_version():
+    """Gets the version counter of the approved messages list.
+
+    It is bumped when a message enters or leaves Approved (status change or
+    delete), so clients holding the same version already have the current
+    list (one primary key lookup).
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(APPROVED_MESSAGES_VERSION_SQL, prepare=PREPARED_STATEMENTS)
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+
+APPROVED_MESSAGES_SQL = """
+    SELECT id, name, message, status, created_at, approved_at
+    FROM messages
+    WHERE status = 'Approved'
+    ORDER BY created_at DESC
+"""
 
 
 def get_approved_messages():
     """Gets only messages with 'Approved' status"""
     with get_db() as conn:
         cursor = conn.cursor(row_factory=dict_row)
-        cursor.execute(
-            """
-            SELECT id, name, message, status, created_at
-            FROM messages
-            WHERE status = 'Approved'
-            ORDER BY created_at DESC
-        """
-        )
+        cursor.execute(APPROVED_MESSAGES_SQL, prepare=PREPARED_STATEMENTS)
 
         rows = cursor.fetchall()
         return [dict(row) for row in rows]
 
 
+MESSAGES_FEED_MAX_LIMIT = 200
+
+
+def encode_messages_cursor(message):
+    """Encodes the keyset (approved_at, id) of an approved message as an opaque token"""
+    key = [message["approved_at"].isoformat(), message["id"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_messages_cursor(token):
+    """Decodes a token produced by encode_messages_cursor()"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        approved_at, message_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(approved_at), int(message_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def latest_messages_cursor(messages):
+    """Cursor pointing after the most recently approved of the given messages"""
+    approved = [m for m in messages if m.get("approved_at") is not None]
+    if not approved:
+        return None
+    return encode_messages_cursor(max(approved, key=lambda m: (m["approved_at"], m["id"])))
+
+
+MESSAGES_SINCE_SQL = """
+    SELECT id, name, message, status, created_at, approved_at
+    FROM messages
+    WHERE status = 'Approved' AND (approved_at, id) > (%s, %s)
+    ORDER BY approved_at ASC, id ASC
+    LIMIT %s
+"""
+
+MESSAGES_FEED_FIRST_SQL = """
+    SELECT id, name, message, status, created_at, approved_at
+    FROM messages
+    WHERE status = 'Approved' AND approved_at IS NOT NULL
+    ORDER BY approved_at ASC, id ASC
+    LIMIT %s
+"""
+
+
+def get_approved_messages_since(since=None, limit=MESSAGES_FEED_MAX_LIMIT):
+    """Gets messages approved after a cursor, oldest approval first.
+
+    Backed by the partial index idx_messages_approved_at, so a poll costs
+    O(new messages). Returns (messages, cursor); pass the cursor back as
+    `since` on the next poll. Messages that stop being approved are not
+    reported here; a full fetch reconciles those.
+
+    approved_at comes from clock_timestamp() when the UPDATE runs, not when
+    it commits. If two approvals run at once and the later timestamp
+    commits first, a poll in between moves the cursor past the earlier one,
+    which is then skipped until the next full fetch.
+    """
+    limit = max(1, min(int(limit), MESSAGES_FEED_MAX_LIMIT))
+    since_key = decode_messages_cursor(since) if since else None
+
+    with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+        if since_key:
+            cursor.execute(
+                MESSAGES_SINCE_SQL,
+                (*since_key, limit),
+                prepare=PREPARED_STATEMENTS,
+            )
+        else:
+            cursor.execute(
+                MESSAGES_FEED_FIRST_SQL,
+                (limit,),
+                prepare=PREPARED_STATEMENTS,
+            )
+
+        rows = [dict(row) for row in cursor.fetchall()]
+
+    next_cursor = encode_messages_cursor(rows[-1]) if rows else since
+    return rows, next_cursor
+
+
+CREATE_MESSAGE_SQL = """
+    INSERT INTO messages (name, message, status)
+    VALUES (%s, %s, 'Pending')
+    RETURNING id, name, message, status, created_at
+"""
+
+
 def create_message(name, message):
     """Creates a new message with 'Pending' status"""
     with get_db() as conn:
         cursor = conn.cursor(row_factory=dict_row)
-        cursor.execute(
-            """
-            INSERT INTO messages (name, message, status)
-            VALUES (%s, %s, 'Pending')
-            RETURNING id, name, message, status, created_at
-        """,
-            (name, message),
-        )
+        cursor.execute(CREATE_MESSAGE_SQL, (name, message), prepare=PREPARED_STATEMENTS)
 
         row = cursor.fetchone()
         return dict(row)
 
 
+GUEST_BY_UUID_SQL = """
+    SELECT id, uuid, first_name, nickname, companion_names, group_name,
+           attending, allergies
+    FROM guests
+    WHERE uuid = %s
+"""
+
+
 def get_guest_by_uuid(guest_uuid):
     """Gets a single guest by uuid (public lookup for the invitation page)"""
     with get_db() as conn:
         cursor = conn.cursor(row_factory=dict_row)
         cursor.execute(
-            """
-            SELECT id, uuid, first_name, nickname, companion_names, group_name,
-                   attending, allergies
-            FROM guests
-            WHERE uuid = %s
-        """,
+            GUEST_BY_UUID_SQL,
             (guest_uuid,),
+            # Prepared once per pooled connection: later opens skip parse/plan
+            prepare=PREPARED_STATEMENTS,
         )
         row = cursor.fetchone()
         if row:
@@ -249,6 +655,26 @@ def get_guest_by_uuid(guest_uuid):
         return None
 
 
+UPDATE_RSVP_WITH_COMPANIONS_SQL = """
+    UPDATE guests
+    SET attending = %s,
+        allergies = %s,
+        companion_names = %s
+    WHERE uuid = %s
+    RETURNING id, uuid, first_name, nickname, companion_names, group_name,
+              attending, allergies
+"""
+
+UPDATE_RSVP_SQL = """
+    UPDATE guests
+    SET attending = %s,
+        allergies = %s
+    WHERE uuid = %s
+    RETURNING id, uuid, first_name, nickname, companion_names, group_name,
+              attending, allergies
+"""
+
+
 def update_guest_rsvp(guest_uuid, attending, allergies=None, companion_names=None):
     """Updates a guest's RSVP response (public, via the invitation page)"""
     with get_db() as conn:
@@ -256,28 +682,15 @@ def update_guest_rsvp(guest_uuid, attending, allergies=None, companion_names=Non
 
         if companion_names is not None:
             cursor.execute(
-                """
-                UPDATE guests
-                SET attending = %s,
-                    allergies = %s,
-                    companion_names = %s
-                WHERE uuid = %s
-                RETURNING id, uuid, first_name, nickname, companion_names, group_name,
-                          attending, allergies
-            """,
+                UPDATE_RSVP_WITH_COMPANIONS_SQL,
                 (attending, allergies, companion_names, guest_uuid),
+                prepare=PREPARED_STATEMENTS,
             )
         else:
             cursor.execute(
-                """
-                UPDATE guests
-                SET attending = %s,
-                    allergies = %s
-                WHERE uuid = %s
-                RETURNING id, uuid, first_name, nickname, companion_names, group_name,
-                          attending, allergies
-            """,
+                UPDATE_RSVP_SQL,
                 (attending, allergies, guest_uuid),
+                prepare=PREPARED_STATEMENTS,
             )
 
         if cursor.rowcount == 0:
@@ -287,24 +700,83 @@ def update_guest_rsvp(guest_uuid, attending, allergies=None, companion_names=Non
         return dict(row)
 
 
+ALL_GUESTS_SQL = """
+    SELECT id, uuid, first_name, last_name, nickname, phone,
+           companion_names, group_name, attending, allergies,
+           link_generated, link_sent, created_at
+    FROM guests
+    ORDER BY first_name ASC, last_name ASC
+"""
+
+
 def get_all_guests():
     """Gets all guests ordered by first name"""
     with get_db() as conn:
         cursor = conn.cursor(row_factory=dict_row)
-        cursor.execute(
-            """
-            SELECT id, uuid, first_name, last_name, nickname, phone,
-                   companion_names, group_name, attending, allergies,
-                   link_generated, link_sent, created_at
-            FROM guests
-            ORDER BY first_name ASC, last_name ASC
-        """
-        )
+        cursor.execute(ALL_GUESTS_SQL, prepare=PREPARED_STATEMENTS)
 
         rows = cursor.fetchall()
         return [dict(row) for row in rows]
 
 
+# Rows per round-trip when streaming guests for link generation
+GUEST_LINKS_BATCH_SIZE = int(os.environ.get("GUEST_LINKS_BATCH_SIZE", "500"))
+
+GUESTS_FOR_LINKS_SQL = """
+    SELECT id, uuid, first_name, nickname, phone, companion_names, group_name
+    FROM guests
+    WHERE NOT link_generated OR NOT %(only_pending)s
+    ORDER BY id
+"""
+
+
+def iter_guests_for_links(only_pending=False):
+    """Streams the guests needed to build invitation links, ordered by id.
+
+    Uses a server-side cursor that fetches GUEST_LINKS_BATCH_SIZE rows per
+    round-trip, so memory does not grow with the guest list. The connection
+    stays borrowed until the generator is exhausted or closed.
+    """
+    with get_db() as conn:
+        with conn.cursor(name="guests_for_links", row_factory=dict_row) as cursor:
+            cursor.itersize = GUEST_LINKS_BATCH_SIZE
+            cursor.execute(GUESTS_FOR_LINKS_SQL, {"only_pending": only_pending})
+            for row in cursor:
+                yield dict(row)
+
+
+MARK_LINKS_GENERATED_SQL = """
+    UPDATE guests
+    SET link_generated = TRUE
+    WHERE id = ANY(%s::integer[]) AND NOT link_generated
+"""
+
+
+def mark_links_generated(guest_ids):
+    """Sets link_generated on the given guests with a single UPDATE.
+    Returns how many guests changed (already marked ones are not rewritten)."""
+    if not guest_ids:
+        return 0
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(MARK_LINKS_GENERATED_SQL, (list(guest_ids),))
+        return cursor.rowcount
+
+
+CREATE_GUEST_SQL = """
+    INSERT INTO guests (
+        first_name, last_name, nickname, phone,
+        companion_names, group_name, attending, allergies,
+        link_generated, link_sent
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    RETURNING id, uuid, first_name, last_name, nickname, phone,
+              companion_names, group_name, attending, allergies,
+              link_generated, link_sent, created_at
+"""
+
+
 def create_guest(
     first_name,
     last_name=None,
@@ -321,17 +793,7 @@ def create_guest(
     with get_db() as conn:
         cursor = conn.cursor(row_factory=dict_row)
         cursor.execute(
-            """
-            INSERT INTO guests (
-                first_name, last_name, nickname, phone,
-                companion_names, group_name, attending, allergies,
-                link_generated, link_sent
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id, uuid, first_name, last_name, nickname, phone,
-                      companion_names, group_name, attending, allergies,
-                      link_generated, link_sent, created_at
-        """,
+            CREATE_GUEST_SQL,
             (
                 first_name,
                 last_name,
@@ -344,73 +806,281 @@ def create_guest(
                 link_generated,
                 link_sent,
             ),
+            prepare=PREPARED_STATEMENTS,
         )
 
         row = cursor.fetchone()
         return dict(row)
 
 
-def update_guest(
-    guest_id,
-    first_name,
-    last_name=None,
-    nickname=None,
-    phone=None,
-    companion_names=None,
-    group_name=None,
-    attending=None,
-    allergies=None,
-    link_generated=False,
-    link_sent=False,
-):
-    """Updates an existing guest"""
+GUEST_IMPORT_COLUMNS = (
+    "first_name",
+    "last_name",
+    "nickname",
+    "phone",
+    "companion_names",
+    "group_name",
+    "attending",
+    "allergies",
+    "link_generated",
+    "link_sent",
+)
+# PostgreSQL types of ("ord", *GUEST_IMPORT_COLUMNS) for the COPY stream
+GUEST_IMPORT_TYPES = (
+    "int4",
+    "text",
+    "text",
+    "text",
+    "text",
+    "text[]",
+    "text",
+    "bool",
+    "text",
+    "bool",
+    "bool",
+)
+
+
+def bulk_create_guests(guests):
+    """Creates many guests in one transaction using COPY.
+
+    `guests` is a list of dicts with the same keys as create_guest()'s
+    arguments. Rows are streamed with COPY into a temporary table and moved
+    into guests with a single INSERT ... SELECT, so the whole list costs a
+    handful of round-trips. Returns the created guests in input order.
+    """
+    if not guests:
+        return []
+
     with get_db() as conn:
         cursor = conn.cursor(row_factory=dict_row)
         cursor.execute(
             """
-            UPDATE guests
-            SET first_name = %s,
-                last_name = %s,
-                nickname = %s,
-                phone = %s,
-                companion_names = %s,
-                group_name = %s,
-                attending = %s,
-                allergies = %s,
-                link_generated = %s,
-                link_sent = %s
-            WHERE id = %s
+            CREATE TEMP TABLE guests_import (
+                ord INTEGER NOT NULL,
+                first_name TEXT NOT NULL,
+                last_name TEXT,
+                nickname TEXT,
+                phone TEXT,
+                companion_names TEXT[] NOT NULL,
+                group_name TEXT,
+                attending BOOLEAN,
+                allergies TEXT,
+                link_generated BOOLEAN NOT NULL,
+                link_sent BOOLEAN NOT NULL
+            ) ON COMMIT DROP
+        """
+        )
+
+        with cursor.copy(
+            f"COPY guests_import (ord, {', '.join(GUEST_IMPORT_COLUMNS)}) FROM STDIN"
+        ) as copy:
+            copy.set_types(list(GUEST_IMPORT_TYPES))
+            for position, guest in enumerate(guests):
+                copy.write_row(
+                    (
+                        position,
+                        guest["first_name"],
+                        guest.get("last_name"),
+                        guest.get("nickname"),
+                        guest.get("phone"),
+                        guest.get("companion_names") or [],
+                        guest.get("group_name"),
+                        guest.get("attending"),
+                        guest.get("allergies"),
+                        bool(guest.get("link_generated", False)),
+                        bool(guest.get("link_sent", False)),
+                    )
+                )
+
+        cursor.execute(
+            f"""
+            INSERT INTO guests ({', '.join(GUEST_IMPORT_COLUMNS)})
+            SELECT {', '.join(GUEST_IMPORT_COLUMNS)}
+            FROM guests_import
+            ORDER BY ord
             RETURNING id, uuid, first_name, last_name, nickname, phone,
                       companion_names, group_name, attending, allergies,
                       link_generated, link_sent, created_at
-        """,
-            (
-                first_name,
-                last_name,
-                nickname,
-                phone,
-                companion_names or [],
-                group_name,
-                attending,
-                allergies,
-                link_generated,
-                link_sent,
-                guest_id,
-            ),
+        """
         )
 
-        if cursor.rowcount == 0:
-            raise ValueError(f"Guest with id {guest_id} not found")
+        rows = cursor.fetchall()
+        # Serial ids follow the ORDER BY, so sorting by id restores input order
+        return sorted((dict(row) for row in rows), key=lambda row: row["id"])
+
+
+# Guest columns that can be changed through update endpoints, with their SQL types
+GUEST_UPDATABLE_COLUMNS = {
+    "first_name": "text",
+    "last_name": "text",
+    "nickname": "text",
+    "phone": "text",
+    "companion_names": "text[]",
+    "group_name": "text",
+    "attending": "boolean",
+    "allergies": "text",
+    "link_generated": "boolean",
+    "link_sent": "boolean",
+}
+
+
+def _bulk_update_guests_query(columns, row_count):
+    """Builds UPDATE guests ... FROM (VALUES ...) setting only `columns`"""
+    row_template = sql.SQL("({})").format(
+        sql.SQL(", ").join(
+            [sql.SQL("%s::integer")]
+            + [
+                sql.SQL("%s::" + GUEST_UPDATABLE_COLUMNS[column])
+                for column in columns
+            ]
+        )
+    )
+    return sql.SQL(
+        """
+        UPDATE guests AS g
+        SET {assignments}
+        FROM (VALUES {rows}) AS v (id, {columns})
+        WHERE g.id = v.id
+        RETURNING g.id, g.uuid, g.first_name, g.last_name, g.nickname,
+                  g.phone, g.companion_names, g.group_name, g.attending,
+                  g.allergies, g.link_generated, g.link_sent, g.created_at
+    """
+    ).format(
+        assignments=sql.SQL(", ").join(
+            sql.SQL("{} = v.{}").format(sql.Identifier(column), sql.Identifier(column))
+            for column in columns
+        ),
+        rows=sql.SQL(", ").join([row_template] * row_count),
+        columns=sql.SQL(", ").join(sql.Identifier(c) for c in columns),
+    )
+
+
+def bulk_update_guests(updates):
+    """Applies partial updates to many guests in one transaction.
+
+    `updates` is a list of (guest_id, fields) where fields maps column names
+    to new values. Updates touching the same set of columns are applied with
+    a single UPDATE ... FROM (VALUES ...) that only sets those columns.
+    Returns (updated_guests, missing_ids).
+    """
+    guest_ids = [guest_id for guest_id, _ in updates]
+    if len(set(guest_ids)) != len(guest_ids):
+        raise ValueError("Each guest id may appear only once per batch")
+
+    groups = {}
+    for guest_id, fields in updates:
+        unknown = set(fields) - set(GUEST_UPDATABLE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown guest fields: {', '.join(sorted(unknown))}")
+        if fields:
+            groups.setdefault(tuple(sorted(fields)), []).append((guest_id, fields))
+
+    updated = {}
+    with get_db() as conn:
+        cursors = []
+        # One pipelined round-trip for all groups instead of one per UPDATE
+        with conn.pipeline():
+            for columns, group in groups.items():
+                params = []
+                for guest_id, fields in group:
+                    params.append(guest_id)
+                    params.extend(fields[column] for column in columns)
+
+                cursor = conn.cursor(row_factory=dict_row)
+                cursor.execute(_bulk_update_guests_query(columns, len(group)), params)
+                cursors.append(cursor)
+
+        for cursor in cursors:
+            for row in cursor.fetchall():
+                updated[row["id"]] = dict(row)
+
+    requested_ids = [guest_id for guest_id, fields in updates if fields]
+    missing_ids = [guest_id for guest_id in requested_ids if guest_id not in updated]
+    return [updated[i] for i in dict.fromkeys(requested_ids) if i in updated], missing_ids
+
+
+GUEST_RETURNING_COLUMNS = (
+    "id, uuid, first_name, last_name, nickname, phone, companion_names, "
+    "group_name, attending, allergies, link_generated, link_sent, created_at"
+)
+
+
+def update_guest_query(columns):
+    """Builds UPDATE guests ... setting `columns` only when one of them changes"""
+    return sql.SQL(
+        """
+        UPDATE guests
+        SET {assignments}
+        WHERE id = %s AND ({changed})
+        RETURNING {returning}
+    """
+    ).format(
+        assignments=sql.SQL(", ").join(
+            sql.SQL("{} = %s").format(sql.Identifier(column)) for column in columns
+        ),
+        changed=sql.SQL(" OR ").join(
+            sql.SQL("{} IS DISTINCT FROM %s::{}").format(
+                sql.Identifier(column),
+                sql.SQL(GUEST_UPDATABLE_COLUMNS[column]),
+            )
+            for column in columns
+        ),
+        returning=sql.SQL(GUEST_RETURNING_COLUMNS),
+    )
+
+
+GUEST_BY_ID_SQL = f"SELECT {GUEST_RETURNING_COLUMNS} FROM guests WHERE id = %s"
+
+
+def clean_guest_update(fields):
+    """Validates update_guest() fields; returns (columns, values) to set"""
+    unknown = set(fields) - set(GUEST_UPDATABLE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown guest fields: {', '.join(sorted(unknown))}")
+
+    if "companion_names" in fields:
+        fields["companion_names"] = fields["companion_names"] or []
 
+    columns = sorted(fields)
+    return columns, [fields[column] for column in columns]
+
+
+def update_guest(guest_id, **fields):
+    """Updates only the given columns of an existing guest.
+
+    Columns whose value is unchanged are compared with IS DISTINCT FROM, so a
+    no-op edit does not write a new row version at all. Returns the guest.
+    """
+    columns, values = clean_guest_update(fields)
+
+    with get_db() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+
+        if columns:
+            cursor.execute(
+                update_guest_query(columns), values + [guest_id] + values
+            )
+            row = cursor.fetchone()
+            if row:
+                return dict(row)
+
+        # Nothing to change (or nothing changed): return the current row
+        cursor.execute(GUEST_BY_ID_SQL, (guest_id,), prepare=PREPARED_STATEMENTS)
         row = cursor.fetchone()
+        if row is None:
+            raise ValueError(f"Guest with id {guest_id} not found")
         return dict(row)
 
 
+DELETE_GUEST_SQL = "DELETE FROM guests WHERE id = %s"
+
+
 def delete_guest(guest_id):
     """Deletes a guest by ID"""
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM guests WHERE id = %s", (guest_id,))
+        cursor.execute(DELETE_GUEST_SQL, (guest_id,), prepare=PREPARED_STATEMENTS)
 
         if cursor.rowcount == 0:
             raise ValueError(f"Guest with id {guest_id} not found")
@@ -418,71 +1088,120 @@ def delete_guest(guest_id):
         return True
 
 
+ALL_MESSAGES_SQL = """
+    SELECT id, name, message, status, created_at
+    FROM messages
+    ORDER BY created_at DESC
+"""
+
+
 def get_all_messages():
     """Gets all messages (for administration)"""
     with get_db() as conn:
         cursor = conn.cursor(row_factory=dict_row)
-        cursor.execute(
-            """
-            SELECT id, name, message, status, created_at
-            FROM messages
-            ORDER BY created_at DESC
-        """
-        )
+        cursor.execute(ALL_MESSAGES_SQL, prepare=PREPARED_STATEMENTS)
 
         rows = cursor.fetchall()
         return [dict(row) for row in rows]
 
 
+PENDING_MESSAGES_SQL = """
+    SELECT id, name, message, status, created_at
+    FROM messages
+    WHERE status = 'Pending'
+    ORDER BY created_at DESC
+"""
+
+
 def get_pending_messages():
     """Gets only messages with 'Pending' status"""
     with get_db() as conn:
         cursor = conn.cursor(row_factory=dict_row)
-        cursor.execute(
-            """
-            SELECT id, name, message, status, created_at
-            FROM messages
-            WHERE status = 'Pending'
-            ORDER BY created_at DESC
-        """
-        )
+        cursor.execute(PENDING_MESSAGES_SQL, prepare=PREPARED_STATEMENTS)
 
         rows = cursor.fetchall()
         return [dict(row) for row in rows]
 
 
+# Bumps the approved messages version only when an approved message is
+# deleted; returns how many messages were deleted
+DELETE_MESSAGE_SQL = """
+    WITH deleted AS (
+        DELETE FROM messages WHERE id = %s RETURNING status
+    ), bumped AS (
+        UPDATE content_versions SET version = version + 1
+        WHERE name = 'approved_messages'
+          AND EXISTS (SELECT 1 FROM deleted WHERE status = 'Approved')
+    )
+    SELECT COUNT(*) FROM deleted
+"""
+
+
 def delete_message(message_id):
     """Deletes a message by ID"""
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM messages WHERE id = %s", (message_id,))
+        # One statement: the delete and the version bump share a round-trip
+        cursor.execute(DELETE_MESSAGE_SQL, (message_id,), prepare=PREPARED_STATEMENTS)
 
-        if cursor.rowcount == 0:
+        if cursor.fetchone()[0] == 0:
             raise ValueError(f"Message with id {message_id} not found")
 
         return True
 
 
+# Re-approving an approved message keeps approved_at, so it keeps its place
+# in the feed instead of being sent again to every poller. The approved
+# messages version is bumped only when the message enters or leaves
+# Approved; the previous status is read under FOR UPDATE so a concurrent
+# change cannot slip between the read and the update.
+UPDATE_MESSAGE_STATUS_SQL = """
+    WITH previous AS (
+        SELECT id, status FROM messages WHERE id = %(id)s FOR UPDATE
+    ), updated AS (
+        UPDATE messages
+        SET status = %(status)s,
+            approved_at = CASE
+                WHEN %(status)s = 'Approved'
+                    THEN COALESCE(messages.approved_at, clock_timestamp()::timestamp)
+                ELSE NULL
+            END
+        FROM previous
+        WHERE messages.id = previous.id
+        RETURNING messages.id, messages.name, messages.message,
+            messages.status, messages.created_at,
+            previous.status AS previous_status
+    ), bumped AS (
+        UPDATE content_versions SET version = version + 1
+        WHERE name = 'approved_messages'
+          AND EXISTS (
+              SELECT 1 FROM updated
+              WHERE (previous_status = 'Approved') <> (status = 'Approved')
+          )
+    )
+    SELECT id, name, message, status, created_at FROM updated
+"""
+
+
+MESSAGE_STATUSES = ["Pending", "Approved", "Denied"]
+
+
 def update_message_status(message_id, status):
     """Updates the status of a message (for administration)"""
-    valid_statuses = ["Pending", "Approved", "Denied"]
-    if status not in valid_statuses:
-        raise ValueError(f"Status must be one of {valid_statuses}")
+    if status not in MESSAGE_STATUSES:
+        raise ValueError(f"Status must be one of {MESSAGE_STATUSES}")
 
     with get_db() as conn:
         cursor = conn.cursor(row_factory=dict_row)
+        # One statement: the update and the version bump share a round-trip
         cursor.execute(
-            """
-            UPDATE messages
-            SET status = %s
-            WHERE id = %s
-            RETURNING id, name, message, status, created_at
-        """,
-            (status, message_id),
+            UPDATE_MESSAGE_STATUS_SQL,
+            {"id": message_id, "status": status},
+            prepare=PREPARED_STATEMENTS,
         )
 
-        if cursor.rowcount == 0:
+        row = cursor.fetchone()
+        if row is None:
             raise ValueError(f"Message with id {message_id} not found")
 
-        row = cursor.fetchone()
         return dict(row)
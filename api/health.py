@@ -1,22 +1,11 @@
-from http.server import BaseHTTPRequestHandler
-import json
+import sys
+import os
 
+# Add api directory to path to import shared modules
+sys.path.append(os.path.dirname(__file__))
+from _handler import JSONHandler
 
-class handler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        response = {"status": "ok", "message": "Backend is running"}
 
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
-        self.end_headers()
-        self.wfile.write(json.dumps(response).encode())
-
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
-        self.end_headers()
+class handler(JSONHandler):
+    def get(self):
+        self.send_json(200, {"status": "ok", "message": "Backend is running"})
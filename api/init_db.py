@@ -1,16 +1,20 @@
 #!/usr/bin/env python3
 """
 Script to initialize the database tables in Supabase PostgreSQL
-Run this once after setting up Supabase to create the tables
+(or in the local SQLite database with STORAGE_ENGINE=sqlite)
+Applies any pending schema migrations (safe to run after every deploy)
 """
 import os
-from db import init_db
+from _storage import init_db
 
 if __name__ == "__main__":
-    print("Initializing database tables...")
+    print("Applying pending migrations...")
     try:
-        init_db()
-        print("✅ Database tables created successfully!")
+        applied = init_db()
+        if applied:
+            print(f"✅ Applied migrations: {', '.join(str(v) for v in applied)}")
+        else:
+            print("✅ Database schema is already up to date")
     except Exception as e:
         print(f"❌ Error initializing database: {e}")
         import traceback
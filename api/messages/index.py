@@ -1,121 +1,78 @@
-from http.server import BaseHTTPRequestHandler
-import json
 import sys
 import os
 
-# Add parent directory to path to import db module
+# Add parent directory to path to import shared modules
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from db import get_approved_messages, create_message
+from _handler import JSONHandler, HTTPError
+from _storage import (
+    get_approved_messages,
+    get_approved_messages_since,
+    get_approved_messages_version,
+    latest_messages_cursor,
+    create_message,
+)
 
 
-class handler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        try:
-            messages = get_approved_messages()
-            # Convert datetime objects to strings
-            response = [
-                {
-                    "id": msg["id"],
-                    "name": msg["name"],
-                    "message": msg["message"],
-                    "status": msg["status"],
-                    "created_at": str(msg["created_at"]),
-                }
-                for msg in messages
-            ]
-
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
-            self.send_header("Access-Control-Allow-Headers", "Content-Type")
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
-        except Exception as e:
-            import traceback
-
-            self.send_response(500)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            error_info = {
-                "error": str(e),
-                "type": type(e).__name__,
-                "traceback": traceback.format_exc(),
-            }
-            self.wfile.write(json.dumps(error_info, indent=2).encode())
-
-    def do_POST(self):
+def serialize_message(msg):
+    return {
+        "id": msg["id"],
+        "name": msg["name"],
+        "message": msg["message"],
+        "status": msg["status"],
+        "created_at": str(msg["created_at"]),
+    }
+
+
+class handler(JSONHandler):
+    compress_responses = True
+
+    def get(self):
+        # "since" in the query, even blank (?since=), selects the delta feed
+        if "since" in self.query:
+            self.get_delta(self.query_param("since"))
+            return
+
+        # Read the version first: a concurrent approval can only make the tag stale, never wrong
+        etag = f'W/"messages-{get_approved_messages_version()}"'
+        if self.etag_matches(etag):
+            self.send_not_modified(etag)
+            return
+
+        messages = get_approved_messages()
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        cursor = latest_messages_cursor(messages)
+        if cursor:
+            # Lets the wall switch to ?since= polling after the first full load
+            headers["X-Messages-Cursor"] = cursor
+        self.send_json(200, [serialize_message(msg) for msg in messages], headers=headers)
+
+    def get_delta(self, since):
+        """Messages approved after `since` (empty = from the beginning) plus the next cursor"""
         try:
-            content_length = int(self.headers.get("Content-Length", 0))
-            body = self.rfile.read(content_length)
-            data = json.loads(body.decode("utf-8"))
-
-            if not data:
-                self.send_response(400)
-                self.send_header("Content-Type", "application/json")
-                self.send_header("Access-Control-Allow-Origin", "*")
-                self.end_headers()
-                self.wfile.write(json.dumps({"error": "No data provided"}).encode())
-                return
-
-            name = data.get("name")
-            message = data.get("message")
-
-            if not name or not message:
-                self.send_response(400)
-                self.send_header("Content-Type", "application/json")
-                self.send_header("Access-Control-Allow-Origin", "*")
-                self.end_headers()
-                self.wfile.write(
-                    json.dumps({"error": "Name and message are required"}).encode()
-                )
-                return
-
-            # Validate that name and message are not empty
-            if not name.strip() or not message.strip():
-                self.send_response(400)
-                self.send_header("Content-Type", "application/json")
-                self.send_header("Access-Control-Allow-Origin", "*")
-                self.end_headers()
-                self.wfile.write(
-                    json.dumps({"error": "Name and message cannot be empty"}).encode()
-                )
-                return
-
-            new_message = create_message(name.strip(), message.strip())
-            response = {
-                "id": new_message["id"],
-                "name": new_message["name"],
-                "message": new_message["message"],
-                "status": new_message["status"],
-                "created_at": str(new_message["created_at"]),
-            }
-
-            self.send_response(201)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
-            self.send_header("Access-Control-Allow-Headers", "Content-Type")
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
-        except Exception as e:
-            import traceback
-
-            self.send_response(500)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            error_info = {
-                "error": str(e),
-                "type": type(e).__name__,
-                "traceback": traceback.format_exc(),
-            }
-            self.wfile.write(json.dumps(error_info, indent=2).encode())
-
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
-        self.end_headers()
+            messages, cursor = get_approved_messages_since(since or None)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+
+        self.send_json(
+            200,
+            {"messages": [serialize_message(msg) for msg in messages], "cursor": cursor},
+        )
+
+    def post(self):
+        data = self.read_json()
+
+        if not data:
+            raise HTTPError(400, "No data provided")
+
+        name = data.get("name")
+        message = data.get("message")
+
+        if not name or not message:
+            raise HTTPError(400, "Name and message are required")
+
+        # Validate that name and message are not empty
+        if not name.strip() or not message.strip():
+            raise HTTPError(400, "Name and message cannot be empty")
+
+        new_message = create_message(name.strip(), message.strip())
+        self.send_json(201, serialize_message(new_message))
@@ -1,46 +1,36 @@
-from http.server import BaseHTTPRequestHandler
-import json
+import hashlib
 import sys
 import os
 
-# Add parent directory to path to import db module
+# Add parent directory to path to import shared modules
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from db import get_best_score
+from _handler import JSONHandler
+from _storage import get_best_score, get_best_score_cache_stats
 
 
-class handler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        try:
-            best_score = get_best_score()
-            if best_score:
-                response = {"bestTime": best_score["time"], "name": best_score["name"]}
-            else:
-                response = {"bestTime": None}
+class handler(JSONHandler):
+    def get(self):
+        best_score = get_best_score()
+        if best_score:
+            fingerprint = f"{best_score['time']}:{best_score['name']}".encode("utf-8")
+            etag = f'W/"best-{hashlib.blake2b(fingerprint, digest_size=8).hexdigest()}"'
+        else:
+            etag = 'W/"best-none"'
 
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS")
-            self.send_header("Access-Control-Allow-Headers", "Content-Type")
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
-        except Exception as e:
-            import traceback
+        if self.etag_matches(etag):
+            self.send_not_modified(etag)
+            return
 
-            self.send_response(500)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            error_info = {
-                "error": str(e),
-                "type": type(e).__name__,
-                "traceback": traceback.format_exc(),
-            }
-            self.wfile.write(json.dumps(error_info, indent=2).encode())
+        cache_stats = get_best_score_cache_stats()
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+            "X-Cache-Stats": f"hits={cache_stats['hits']}; misses={cache_stats['misses']}",
+        }
 
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
-        self.end_headers()
+        if best_score:
+            response = {"bestTime": best_score["time"], "name": best_score["name"]}
+        else:
+            response = {"bestTime": None}
+
+        self.send_json(200, response, headers=headers)
@@ -1,95 +1,43 @@
-from http.server import BaseHTTPRequestHandler
-import json
 import sys
 import os
 
-# Add parent directory to path to import db module
+# Add parent directory to path to import shared modules
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from db import create_score, get_all_scores
+from _handler import JSONHandler, HTTPError
+from _storage import create_score
 
 
-class handler(BaseHTTPRequestHandler):
-    def do_POST(self):
-        try:
-            content_length = int(self.headers.get("Content-Length", 0))
-            body = self.rfile.read(content_length)
-            data = json.loads(body.decode("utf-8"))
-
-            if not data:
-                self.send_response(400)
-                self.send_header("Content-Type", "application/json")
-                self.send_header("Access-Control-Allow-Origin", "*")
-                self.end_headers()
-                self.wfile.write(json.dumps({"error": "No data provided"}).encode())
-                return
-
-            name = data.get("name")
-            time = data.get("time")
+class handler(JSONHandler):
+    def post(self):
+        data = self.read_json()
 
-            if not name or time is None:
-                self.send_response(400)
-                self.send_header("Content-Type", "application/json")
-                self.send_header("Access-Control-Allow-Origin", "*")
-                self.end_headers()
-                self.wfile.write(
-                    json.dumps({"error": "Name and time are required"}).encode()
-                )
-                return
+        if not data:
+            raise HTTPError(400, "No data provided")
 
-            # Validate that time is a positive number
-            try:
-                time = int(time)
-                if time < 0:
-                    self.send_response(400)
-                    self.send_header("Content-Type", "application/json")
-                    self.send_header("Access-Control-Allow-Origin", "*")
-                    self.end_headers()
-                    self.wfile.write(
-                        json.dumps({"error": "Time must be a positive number"}).encode()
-                    )
-                    return
-            except (ValueError, TypeError):
-                self.send_response(400)
-                self.send_header("Content-Type", "application/json")
-                self.send_header("Access-Control-Allow-Origin", "*")
-                self.end_headers()
-                self.wfile.write(
-                    json.dumps({"error": "Time must be a valid number"}).encode()
-                )
-                return
+        name = data.get("name")
+        time = data.get("time")
 
-            score = create_score(name, time)
-            response = {
-                "id": score["id"],
-                "name": score["name"],
-                "time": score["time"],
-                "created_at": str(score["created_at"]),
-            }
+        if not name or time is None:
+            raise HTTPError(400, "Name and time are required")
 
-            self.send_response(201)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.send_header("Access-Control-Allow-Methods", "POST, OPTIONS")
-            self.send_header("Access-Control-Allow-Headers", "Content-Type")
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
-        except Exception as e:
-            import traceback
-
-            self.send_response(500)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
-            error_info = {
-                "error": str(e),
-                "type": type(e).__name__,
-                "traceback": traceback.format_exc(),
-            }
-            self.wfile.write(json.dumps(error_info, indent=2).encode())
-
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "POST, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
-        self.end_headers()
+        # Validate that time is a positive number
+        try:
+            time = int(time)
+        except (ValueError, TypeError):
+            raise HTTPError(400, "Time must be a valid number")
+        if time < 0:
+            raise HTTPError(400, "Time must be a positive number")
+
+        with_rank = data.get("with_rank") is True
+        score = create_score(name, time, with_rank=with_rank)
+        response = {
+            "id": score["id"],
+            "name": score["name"],
+            "time": score["time"],
+            "created_at": str(score["created_at"]),
+        }
+        if with_rank:
+            response["rank"] = score["rank"]
+            response["total_plays"] = score["total_plays"]
+
+        self.send_json(201, response)
@@ -0,0 +1,114 @@
+"""
+Sampled, buffered access log for the Flask backend.
+
+Each logged request is one JSON line with its status, total time and the
+time spent in the database. Request threads only put a record on a queue;
+a background listener thread serializes and writes it, so logging never
+blocks a request on stdout/file I/O.
+
+Configuration (environment variables):
+    ACCESS_LOG_SAMPLE_RATE  fraction of requests logged (0.0 - 1.0, default 0.1)
+    ACCESS_LOG_SLOW_MS      requests slower than this are always logged (default 500)
+    ACCESS_LOG_FILE         append to this file instead of stdout
+
+Server errors (5xx) are always logged.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+
+class _JSONLineFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.msg, separators=(",", ":"), default=str)
+
+
+class AccessLogger:
+    def __init__(self, sample_rate=0.1, slow_ms=500.0, stream=None, filename=None):
+        self.sample_rate = max(0.0, min(float(sample_rate), 1.0))
+        self.slow_ms = float(slow_ms)
+
+        if filename:
+            target = logging.FileHandler(filename, encoding="utf-8")
+        else:
+            target = logging.StreamHandler(stream or sys.stdout)
+        target.setFormatter(_JSONLineFormatter())
+        self._target = target
+
+        self._queue = None
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._logger = logging.getLogger(f"access.{id(self)}")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            sample_rate=os.environ.get("ACCESS_LOG_SAMPLE_RATE", "0.1"),
+            slow_ms=os.environ.get("ACCESS_LOG_SLOW_MS", "500"),
+            filename=os.environ.get("ACCESS_LOG_FILE"),
+        )
+
+    def should_log(self, status, total_ms):
+        if status >= 500 or total_ms >= self.slow_ms:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def log(self, method, path, status, total_ms, db_ms, db_calls, size=None):
+        """Queues one access record if it is sampled; returns True when logged"""
+        if not self.should_log(status, total_ms):
+            return False
+        self._ensure_started()
+        self._logger.info(
+            {
+                "ts": round(time.time(), 3),
+                "method": method,
+                "path": path,
+                "status": status,
+                "total_ms": round(total_ms, 2),
+                "db_ms": round(db_ms, 2),
+                "db_calls": db_calls,
+                "bytes": size,
+            }
+        )
+        return True
+
+    def _ensure_started(self):
+        """Starts the writer thread, again in a forked worker (threads do not
+        survive fork)"""
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.SimpleQueue()
+            self._listener = logging.handlers.QueueListener(self._queue, self._target)
+            for handler in list(self._logger.handlers):
+                self._logger.removeHandler(handler)
+            self._logger.addHandler(_DeferredQueueHandler(self._queue))
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def close(self):
+        """Flushes queued records and stops the writer thread"""
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+        self._listener = None
+        self._pid = None
@@ -1,18 +1,50 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
-from database import (
+import os
+import sys
+
+# Add the api directory to path to share the storage interface with Vercel
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(PROJECT_DIR, "api"))
+# This server runs on the local SQLite database; Supabase settings in the
+# environment must not switch it to production. Only an explicit
+# STORAGE_ENGINE=postgres does.
+os.environ.setdefault("STORAGE_ENGINE", "sqlite")
+from _storage import (
     init_db,
     get_best_score,
     create_score,
-    get_all_scores,
+    get_scores_page,
+    SCORES_PAGE_DEFAULT_LIMIT,
     get_approved_messages,
     create_message,
     get_all_messages,
     get_pending_messages,
     update_message_status,
     delete_message,
+    get_guest_by_uuid,
+    update_guest_rsvp,
+    get_all_guests,
+    create_guest,
+    bulk_create_guests,
+    update_guest,
+    bulk_update_guests,
+    delete_guest,
+    iter_guests_for_links,
+    mark_links_generated,
+    reset_db_stats,
+    get_db_stats,
 )
-import os
+# Guest payload validation, shared with the Vercel handlers (raises ValueError)
+from _guest_fields import clean_guest_fields
+from access_log import AccessLogger
+import io
+import time
+import uuid as uuid_module
+
+# save_the_date.py holds the guest CSV parsing and the invitation links
+sys.path.append(os.path.join(PROJECT_DIR, "save the date"))
+from save_the_date import leer_invitados_csv, URL_SITIO, enlaces_invitados
 
 app = Flask(__name__)
 
@@ -41,7 +73,7 @@ CORS(
     resources={
         r"/api/*": {
             "origins": cors_origins,
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+            "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
             "allow_headers": ["Content-Type", "Authorization"],
         }
     },
@@ -51,18 +83,34 @@ CORS(
 init_db()
 
 
-# Add request logging middleware
+access_logger = AccessLogger.from_env()
+
+
+# Per-request timing: sampled JSON access log plus a Server-Timing header
 @app.before_request
-def log_request_info():
-    print(f"\n=== Request: {request.method} {request.path} ===")
-    print(f"Headers: {dict(request.headers)}")
-    if request.is_json:
-        print(f"JSON Body: {request.get_json()}")
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    reset_db_stats()
 
 
 @app.after_request
 def log_response_info(response):
-    print(f"Response: {response.status_code}")
+    started = g.get("request_started")
+    if started is None:
+        return response
+    total_ms = (time.perf_counter() - started) * 1000
+    db_seconds, db_calls = get_db_stats()
+    db_ms = db_seconds * 1000
+    response.headers["Server-Timing"] = f"db;dur={db_ms:.1f}, app;dur={total_ms:.1f}"
+    access_logger.log(
+        request.method,
+        request.path,
+        response.status_code,
+        total_ms,
+        db_ms,
+        db_calls,
+        response.content_length,
+    )
     return response
 
 
@@ -109,18 +157,18 @@ def submit_score():
         except (ValueError, TypeError):
             return jsonify({"error": "Time must be a valid number"}), 400
 
-        score = create_score(name, time)
-        return (
-            jsonify(
-                {
-                    "id": score["id"],
-                    "name": score["name"],
-                    "time": score["time"],
-                    "created_at": score["created_at"],
-                }
-            ),
-            201,
-        )
+        with_rank = data.get("with_rank") is True
+        score = create_score(name, time, with_rank=with_rank)
+        response = {
+            "id": score["id"],
+            "name": score["name"],
+            "time": score["time"],
+            "created_at": score["created_at"],
+        }
+        if with_rank:
+            response["rank"] = score["rank"]
+            response["total_plays"] = score["total_plays"]
+        return jsonify(response), 201
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -178,13 +226,19 @@ def submit_message():
 
 
 @app.route("/api/admin/scores", methods=["GET"])
-def get_all_scores_endpoint():
-    """Gets all scores for ranking (admin only)"""
+def get_scores_page_endpoint():
+    """Gets one page of scores for ranking (admin only)"""
     try:
-        scores = get_all_scores()
-        return jsonify(scores), 200
+        try:
+            limit = int(request.args.get("limit", SCORES_PAGE_DEFAULT_LIMIT))
+            scores, next_cursor = get_scores_page(
+                limit=limit, after=request.args.get("after")
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({"scores": scores, "next_cursor": next_cursor}), 200
     except Exception as e:
-        print(f"Error in get_all_scores_endpoint: {str(e)}")
+        print(f"Error in get_scores_page_endpoint: {str(e)}")
         import traceback
 
         traceback.print_exc()
@@ -236,6 +290,220 @@ def delete_message_endpoint(message_id):
         return jsonify({"error": str(e)}), 500
 
 
+MAX_IMPORT_GUESTS = 5000
+MAX_BATCH_UPDATES = 1000
+
+
+def serialize_public_guest(guest):
+    """Guest fields visible on the invitation page"""
+    return {
+        "uuid": guest["uuid"],
+        "first_name": guest["first_name"],
+        "nickname": guest["nickname"],
+        "companion_names": guest["companion_names"],
+        "group_name": guest["group_name"],
+        "attending": guest["attending"],
+        "allergies": guest["allergies"],
+    }
+
+
+def parse_uuid(raw_uuid):
+    try:
+        return str(uuid_module.UUID(raw_uuid))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+@app.route("/api/guests", methods=["GET"])
+def get_guest_endpoint():
+    """Gets a guest by uuid (invitation page)"""
+    try:
+        guest_uuid = parse_uuid(request.args.get("uuid"))
+        guest = get_guest_by_uuid(guest_uuid) if guest_uuid else None
+        if not guest:
+            return jsonify({"error": "Guest not found"}), 404
+        return jsonify(serialize_public_guest(guest)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/guests", methods=["POST"])
+def submit_rsvp():
+    """Saves a guest's RSVP response"""
+    try:
+        data = request.get_json(silent=True) or {}
+
+        guest_uuid = parse_uuid(data.get("uuid"))
+        if not guest_uuid:
+            return jsonify({"error": "Valid uuid is required"}), 400
+
+        attending = data.get("attending")
+        if not isinstance(attending, bool):
+            return jsonify({"error": "attending must be true or false"}), 400
+
+        allergies = (data.get("allergies") or "").strip() or None
+
+        companion_names = data.get("companion_names")
+        if companion_names is not None:
+            companion_names = [(name or "").strip() for name in companion_names]
+
+        updated_guest = update_guest_rsvp(
+            guest_uuid, attending, allergies, companion_names
+        )
+        return jsonify(serialize_public_guest(updated_guest)), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/admin/guests", methods=["GET"])
+def get_all_guests_endpoint():
+    """Gets all guests (admin only)"""
+    try:
+        return jsonify(get_all_guests()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/admin/guests", methods=["POST"])
+def create_guest_endpoint():
+    """Creates a guest (admin only)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        if not (data.get("first_name") or "").strip():
+            return jsonify({"error": "first_name is required"}), 400
+
+        try:
+            fields = clean_guest_fields(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify(create_guest(**fields)), 201
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/admin/guests/<int:guest_id>", methods=["PUT", "PATCH"])
+def update_guest_endpoint(guest_id):
+    """Updates only the fields present in the body (admin only)"""
+    try:
+        try:
+            fields = clean_guest_fields(request.get_json(silent=True) or {})
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify(update_guest(guest_id, **fields)), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/admin/guests/<int:guest_id>", methods=["DELETE"])
+def delete_guest_endpoint(guest_id):
+    """Deletes a guest (admin only)"""
+    try:
+        delete_guest(guest_id)
+        return jsonify({"message": "Guest deleted successfully"}), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/admin/guests/bulk", methods=["POST"])
+def bulk_import_guests_endpoint():
+    """Bulk import: a JSON array of guests, or a guest CSV (Content-Type: text/csv)"""
+    try:
+        if request.mimetype == "text/csv":
+            try:
+                text = request.get_data().decode("utf-8-sig")
+            except UnicodeDecodeError:
+                return jsonify({"error": "CSV must be UTF-8 encoded"}), 400
+            guests = leer_invitados_csv(io.StringIO(text, newline=""))
+        else:
+            data = request.get_json(silent=True)
+            if not isinstance(data, list):
+                return jsonify({"error": "Expected a JSON array of guests"}), 400
+            guests = []
+            for position, guest in enumerate(data):
+                if not isinstance(guest, dict) or not (guest.get("first_name") or "").strip():
+                    return (
+                        jsonify({"error": f"Guest #{position + 1}: first_name is required"}),
+                        400,
+                    )
+                try:
+                    guests.append(clean_guest_fields(guest))
+                except ValueError as e:
+                    return jsonify({"error": f"Guest #{position + 1}: {e}"}), 400
+
+        if not guests:
+            return jsonify({"error": "No guests provided"}), 400
+        if len(guests) > MAX_IMPORT_GUESTS:
+            return jsonify({"error": f"At most {MAX_IMPORT_GUESTS} guests per import"}), 400
+
+        created = bulk_create_guests(guests)
+        return jsonify({"imported": len(created), "guests": created}), 201
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/admin/guests/bulk", methods=["PATCH"])
+def bulk_update_guests_endpoint():
+    """Batch partial update: [{"id": 1, "fields": {"link_sent": true}}, ...]"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, list) or not data:
+            return jsonify({"error": "Expected a non-empty JSON array of updates"}), 400
+        if len(data) > MAX_BATCH_UPDATES:
+            return jsonify({"error": f"At most {MAX_BATCH_UPDATES} updates per request"}), 400
+
+        try:
+            updates = []
+            for position, item in enumerate(data):
+                guest_id = item.get("id") if isinstance(item, dict) else None
+                if not isinstance(guest_id, int) or isinstance(guest_id, bool):
+                    raise ValueError(f"Update #{position + 1}: integer id is required")
+                updates.append((guest_id, clean_guest_fields(item.get("fields") or {})))
+
+            updated, missing_ids = bulk_update_guests(updates)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify({"updated": updated, "not_found": missing_ids}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/admin/guests/links", methods=["POST"])
+def generate_guest_links_endpoint():
+    """Generates the invitation links of all guests (or only those without
+    link_generated) and marks them with a single UPDATE"""
+    try:
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({"error": "Expected a JSON object"}), 400
+
+        base_url = data.get("base_url") or URL_SITIO
+        if not isinstance(base_url, str) or not base_url.startswith(("http://", "https://")):
+            return jsonify({"error": "base_url must be an http(s) URL"}), 400
+
+        links = list(
+            enlaces_invitados(
+                iter_guests_for_links(only_pending=bool(data.get("only_pending"))),
+                base_url,
+            )
+        )
+
+        marked = mark_links_generated([link["id"] for link in links])
+        return jsonify({"generated": len(links), "marked": marked, "links": links}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/api/health", methods=["GET"])
 def health_check():
     """Endpoint to verify that the server is running"""
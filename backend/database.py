@@ -1,16 +1,82 @@
+import base64
+import json
 import sqlite3
 import os
+import sys
+import threading
+import time as time_module
+import uuid as uuid_module
 from datetime import datetime
 from contextlib import contextmanager
 
+# Add the api directory to path to share the engine-independent modules
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+import _score_cache as score_cache
+
 # Database path
 DB_PATH = os.path.join(os.path.dirname(__file__), 'matrimonio.db')
 
+# Connection tuning (overridable through environment variables)
+# Page cache per connection, in KiB (negative cache_size means KiB to SQLite)
+SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', '16384'))
+# Bytes of the database file read through a memory map (0 disables it)
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', str(128 * 1024 * 1024)))
+# Seconds a writer waits for the write lock before "database is locked"
+SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', '5'))
+
+_local = threading.local()
+
+def _connect():
+    """Opens and tunes a new SQLite connection"""
+    conn = sqlite3.connect(DB_PATH, timeout=SQLITE_BUSY_TIMEOUT)
+    conn.row_factory = sqlite3.Row  # Allows access by column name
+    # WAL: readers never block the writer and the writer never blocks readers.
+    # The journal mode is stored in the file, the other pragmas are per connection.
+    conn.execute('PRAGMA journal_mode=WAL')
+    # In WAL mode NORMAL only syncs at checkpoints; still safe against corruption
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}')
+    conn.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+def _thread_connection():
+    """Returns this thread's persistent connection, opening it on first use.
+    Reopened after a fork (a connection must not cross processes) or when
+    DB_PATH changes."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.key == (os.getpid(), DB_PATH):
+        return conn
+    conn = _connect()
+    _local.conn = conn
+    _local.key = (os.getpid(), DB_PATH)
+    return conn
+
+def close_db_connection():
+    """Closes the calling thread's persistent connection (if any)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        _local.conn = None
+        if _local.key[0] == os.getpid():
+            conn.close()
+
+def reset_db_stats():
+    """Starts a new measurement of database time for the calling thread"""
+    _local.db_seconds = 0.0
+    _local.db_calls = 0
+
+def get_db_stats():
+    """Returns (seconds, calls) spent in get_db_connection() blocks by this
+    thread since the last reset_db_stats()"""
+    return getattr(_local, 'db_seconds', 0.0), getattr(_local, 'db_calls', 0)
+
 @contextmanager
 def get_db_connection():
-    """Context manager to handle database connections"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # Allows access by column name
+    """Context manager to handle database connections.
+    Each thread keeps one open connection; the block runs as one transaction
+    that is committed on success and rolled back on error."""
+    started = time_module.perf_counter()
+    conn = _thread_connection()
     try:
         yield conn
         conn.commit()
@@ -18,25 +84,22 @@ def get_db_connection():
         conn.rollback()
         raise
     finally:
-        conn.close()
+        _local.db_seconds = getattr(_local, 'db_seconds', 0.0) + time_module.perf_counter() - started
+        _local.db_calls = getattr(_local, 'db_calls', 0) + 1
 
-def init_db():
-    """Initializes the database and creates tables if they don't exist"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        # Scores table
-        cursor.execute('''
+# Ordered schema migrations: (version, description, statements).
+# Never edit an applied step; append a new one instead.
+MIGRATIONS = [
+    (1, 'base schema: scores, messages', [
+        '''
             CREATE TABLE IF NOT EXISTS scores (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
                 time INTEGER NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        ''')
-        
-        # Messages table
-        cursor.execute('''
+        ''',
+        '''
             CREATE TABLE IF NOT EXISTS messages (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
@@ -44,15 +107,101 @@ def init_db():
                 status TEXT NOT NULL DEFAULT 'Pending',
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        ''')
-        
+        ''',
         # Indexes to improve performance
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_scores_time ON scores(time ASC)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_status ON messages(status)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_created ON messages(created_at DESC)')
+        'CREATE INDEX IF NOT EXISTS idx_scores_time ON scores(time ASC)',
+        'CREATE INDEX IF NOT EXISTS idx_messages_status ON messages(status)',
+        'CREATE INDEX IF NOT EXISTS idx_messages_created ON messages(created_at DESC)',
+    ]),
+    (2, 'keyset pagination index for the admin ranking', [
+        'CREATE INDEX IF NOT EXISTS idx_scores_time_created_id ON scores(time ASC, created_at ASC, id ASC)',
+    ]),
+    (3, 'guests for invitations and RSVPs', [
+        # companion_names is a JSON array; booleans are stored as 0/1
+        '''
+            CREATE TABLE IF NOT EXISTS guests (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                uuid TEXT NOT NULL,
+                first_name TEXT NOT NULL,
+                last_name TEXT,
+                nickname TEXT,
+                phone TEXT,
+                companion_names TEXT NOT NULL DEFAULT '[]',
+                group_name TEXT,
+                attending INTEGER,
+                allergies TEXT,
+                link_generated INTEGER NOT NULL DEFAULT 0,
+                link_sent INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_guests_uuid ON guests(uuid)',
+    ]),
+    (4, 'content version counters and approved_at for the message wall', [
+        '''
+            CREATE TABLE IF NOT EXISTS content_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        ''',
+        "INSERT OR IGNORE INTO content_versions (name) VALUES ('approved_messages')",
+        'ALTER TABLE messages ADD COLUMN approved_at TIMESTAMP',
+        "UPDATE messages SET approved_at = created_at WHERE status = 'Approved' AND approved_at IS NULL",
+        "CREATE INDEX IF NOT EXISTS idx_messages_approved_at ON messages(approved_at, id) WHERE status = 'Approved'",
+    ]),
+]
 
-def get_best_score():
-    """Gets the score with the lowest time (best time)"""
+def get_schema_version(conn):
+    """Returns the latest applied migration version (0 if none)"""
+    try:
+        row = conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()
+    except sqlite3.OperationalError:
+        # schema_version does not exist yet
+        return 0
+    return row[0]
+
+def init_db():
+    """Brings the database schema up to date by applying pending migrations.
+    When the schema is current this is a single SELECT on schema_version.
+    Returns the list of versions applied by this call."""
+    latest = MIGRATIONS[-1][0]
+
+    with get_db_connection() as conn:
+        current = get_schema_version(conn)
+        if current >= latest:
+            return []
+
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        applied = []
+        for version, description, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            for statement in statements:
+                try:
+                    cursor.execute(statement)
+                except sqlite3.OperationalError as e:
+                    # SQLite has no ADD COLUMN IF NOT EXISTS: the column is
+                    # already there when a step runs again on an existing table
+                    if 'duplicate column name' not in str(e):
+                        raise
+            cursor.execute(
+                'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                (version, description)
+            )
+            applied.append(version)
+
+        return applied
+
+def _fetch_best_score():
+    """Reads the score with the lowest time straight from the database"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute('''
@@ -70,8 +219,20 @@ def get_best_score():
             }
         return None
 
-def create_score(name, time):
-    """Creates a new score"""
+def get_best_score():
+    """Gets the score with the lowest time (best time), cached for BEST_SCORE_CACHE_TTL seconds"""
+    return score_cache.get_or_load(_fetch_best_score)
+
+def get_best_score_cache_stats():
+    """Returns the hit/miss counters of the best score cache"""
+    return score_cache.stats()
+
+def invalidate_best_score_cache():
+    """Drops the cached best score so the next read goes to the database"""
+    score_cache.invalidate()
+
+def create_score(name, time, with_rank=False):
+    """Creates a new score (optionally with the player's rank and total plays)"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute('''
@@ -87,40 +248,112 @@ def create_score(name, time):
         ''', (cursor.lastrowid,))
         
         row = cursor.fetchone()
-        return {
+        score = {
             'id': row['id'],
             'name': row['name'],
             'time': row['time'],
             'created_at': row['created_at']
         }
 
-def get_all_scores():
-    """Gets all scores ordered by time (best first) for ranking"""
+        if with_rank:
+            # Both counts are served from idx_scores_time
+            cursor.execute('''
+                SELECT
+                    (SELECT COUNT(*) FROM scores WHERE time < ?) + 1 AS rank,
+                    (SELECT COUNT(*) FROM scores) AS total_plays
+            ''', (time,))
+            counts = cursor.fetchone()
+            score['rank'] = counts['rank']
+            score['total_plays'] = counts['total_plays']
+
+    score_cache.record_score(score)
+    return score
+
+SCORES_PAGE_DEFAULT_LIMIT = 50
+SCORES_PAGE_MAX_LIMIT = 500
+
+def encode_scores_cursor(score):
+    """Encodes the keyset (time, created_at, id) of a score as an opaque token"""
+    key = [score['time'], str(score['created_at']), score['id']]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+def decode_scores_cursor(token):
+    """Decodes a token produced by encode_scores_cursor()"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        time, created_at, score_id = json.loads(base64.urlsafe_b64decode(padded))
+        return int(time), str(created_at), int(score_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def get_scores_page(limit=SCORES_PAGE_DEFAULT_LIMIT, after=None):
+    """Gets one page of scores ordered by time (best first), keyset-paginated.
+    Returns (scores, next_cursor); next_cursor is None on the last page."""
+    limit = max(1, min(int(limit), SCORES_PAGE_MAX_LIMIT))
+    after_key = decode_scores_cursor(after) if after else None
+
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, name, time, created_at
-            FROM scores
-            ORDER BY time ASC, created_at ASC
-        ''')
-        
-        rows = cursor.fetchall()
-        return [
+        if after_key:
+            cursor.execute('''
+                SELECT id, name, time, created_at
+                FROM scores
+                WHERE (time, created_at, id) > (?, ?, ?)
+                ORDER BY time ASC, created_at ASC, id ASC
+                LIMIT ?
+            ''', (*after_key, limit + 1))
+        else:
+            cursor.execute('''
+                SELECT id, name, time, created_at
+                FROM scores
+                ORDER BY time ASC, created_at ASC, id ASC
+                LIMIT ?
+            ''', (limit + 1,))
+
+        rows = [
             {
                 'id': row['id'],
                 'name': row['name'],
                 'time': row['time'],
                 'created_at': row['created_at']
             }
-            for row in rows
+            for row in cursor.fetchall()
         ]
 
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_scores_cursor(rows[-1])
+    return rows, next_cursor
+
+def _bump_approved_messages_version(cursor, message_id, status=None):
+    """Bumps the approved messages version if message_id enters or leaves
+    Approved by moving to `status` (None: the message is being deleted).
+    Run it before the write, inside the caller's transaction; as a write it
+    takes the database lock, so the status it reads cannot change under it."""
+    cursor.execute('''
+        UPDATE content_versions SET version = version + 1
+        WHERE name = 'approved_messages' AND EXISTS (
+            SELECT 1 FROM messages
+            WHERE id = ? AND (status = 'Approved') <> (COALESCE(?, '') = 'Approved')
+        )
+    ''', (message_id, status))
+
+def get_approved_messages_version():
+    """Gets the version counter of the approved messages list.
+    It is bumped when a message enters or leaves Approved (status change or delete)."""
+    with get_db_connection() as conn:
+        row = conn.execute(
+            "SELECT version FROM content_versions WHERE name = 'approved_messages'"
+        ).fetchone()
+        return row[0] if row else 0
+
 def get_approved_messages():
     """Gets only messages with 'Approved' status"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT id, name, message, status, created_at
+            SELECT id, name, message, status, created_at, approved_at
             FROM messages
             WHERE status = 'Approved'
             ORDER BY created_at DESC
@@ -133,11 +366,65 @@ def get_approved_messages():
                 'name': row['name'],
                 'message': row['message'],
                 'status': row['status'],
-                'created_at': row['created_at']
+                'created_at': row['created_at'],
+                'approved_at': row['approved_at']
             }
             for row in rows
         ]
 
+MESSAGES_FEED_MAX_LIMIT = 200
+
+def encode_messages_cursor(message):
+    """Encodes the keyset (approved_at, id) of an approved message as an opaque token"""
+    key = [str(message['approved_at']), message['id']]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+def decode_messages_cursor(token):
+    """Decodes a token produced by encode_messages_cursor()"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        approved_at, message_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(approved_at), int(message_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def latest_messages_cursor(messages):
+    """Cursor pointing after the most recently approved of the given messages"""
+    approved = [m for m in messages if m.get('approved_at') is not None]
+    if not approved:
+        return None
+    return encode_messages_cursor(max(approved, key=lambda m: (m['approved_at'], m['id'])))
+
+def get_approved_messages_since(since=None, limit=MESSAGES_FEED_MAX_LIMIT):
+    """Gets messages approved after a cursor, oldest approval first.
+    Returns (messages, cursor); pass the cursor back as `since` on the next poll."""
+    limit = max(1, min(int(limit), MESSAGES_FEED_MAX_LIMIT))
+    since_key = decode_messages_cursor(since) if since else None
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if since_key:
+            cursor.execute('''
+                SELECT id, name, message, status, created_at, approved_at
+                FROM messages
+                WHERE status = 'Approved' AND (approved_at, id) > (?, ?)
+                ORDER BY approved_at ASC, id ASC
+                LIMIT ?
+            ''', (*since_key, limit))
+        else:
+            cursor.execute('''
+                SELECT id, name, message, status, created_at, approved_at
+                FROM messages
+                WHERE status = 'Approved' AND approved_at IS NOT NULL
+                ORDER BY approved_at ASC, id ASC
+                LIMIT ?
+            ''', (limit,))
+
+        rows = [dict(row) for row in cursor.fetchall()]
+
+    next_cursor = encode_messages_cursor(rows[-1]) if rows else since
+    return rows, next_cursor
+
 def create_message(name, message):
     """Creates a new message with 'Pending' status"""
     with get_db_connection() as conn:
@@ -213,26 +500,36 @@ def delete_message(message_id):
     """Deletes a message by ID"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        _bump_approved_messages_version(cursor, message_id)
         cursor.execute('DELETE FROM messages WHERE id = ?', (message_id,))
         
         if cursor.rowcount == 0:
             raise ValueError(f"Message with id {message_id} not found")
-        
+
         return True
 
+MESSAGE_STATUSES = ['Pending', 'Approved', 'Denied']
+
 def update_message_status(message_id, status):
     """Updates the status of a message (for administration)"""
-    valid_statuses = ['Pending', 'Approved', 'Denied']
-    if status not in valid_statuses:
-        raise ValueError(f"Status must be one of {valid_statuses}")
+    if status not in MESSAGE_STATUSES:
+        raise ValueError(f"Status must be one of {MESSAGE_STATUSES}")
     
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        _bump_approved_messages_version(cursor, message_id, status)
+        # Millisecond timestamps keep approved_at ordered as text; approving
+        # an already approved message keeps its place in the feed
         cursor.execute('''
             UPDATE messages
-            SET status = ?
+            SET status = ?,
+                approved_at = CASE
+                    WHEN ? = 'Approved'
+                        THEN COALESCE(approved_at, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+                    ELSE NULL
+                END
             WHERE id = ?
-        ''', (status, message_id))
+        ''', (status, status, message_id))
         
         if cursor.rowcount == 0:
             raise ValueError(f"Message with id {message_id} not found")
@@ -251,3 +548,255 @@ def update_message_status(message_id, status):
             'status': row['status'],
             'created_at': row['created_at']
         }
+
+# Guest helpers (same behavior as api/db.py, adapted to SQLite types)
+GUEST_COLUMNS = '''
+    id, uuid, first_name, last_name, nickname, phone, companion_names,
+    group_name, attending, allergies, link_generated, link_sent, created_at
+'''
+
+# Guest columns that can be changed through update endpoints
+GUEST_UPDATABLE_COLUMNS = (
+    'first_name', 'last_name', 'nickname', 'phone', 'companion_names',
+    'group_name', 'attending', 'allergies', 'link_generated', 'link_sent',
+)
+
+def _guest_from_row(row):
+    """Converts a guests row into the same dict shape api/db.py returns"""
+    guest = dict(row)
+    guest['companion_names'] = json.loads(guest['companion_names'] or '[]')
+    if guest['attending'] is not None:
+        guest['attending'] = bool(guest['attending'])
+    guest['link_generated'] = bool(guest['link_generated'])
+    guest['link_sent'] = bool(guest['link_sent'])
+    return guest
+
+def _guest_column_value(column, value):
+    """Converts a Python value into its SQLite representation for `column`"""
+    if column == 'companion_names':
+        return json.dumps(value or [])
+    if column in ('attending', 'link_generated', 'link_sent') and value is not None:
+        return int(bool(value))
+    return value
+
+def _check_guest_fields(fields):
+    unknown = set(fields) - set(GUEST_UPDATABLE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown guest fields: {', '.join(sorted(unknown))}")
+
+def get_guest_by_uuid(guest_uuid):
+    """Gets a single guest by uuid (public lookup for the invitation page)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT {GUEST_COLUMNS} FROM guests WHERE uuid = ?', (guest_uuid,))
+        row = cursor.fetchone()
+        if row:
+            return _guest_from_row(row)
+        return None
+
+def update_guest_rsvp(guest_uuid, attending, allergies=None, companion_names=None):
+    """Updates a guest's RSVP response (public, via the invitation page)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        if companion_names is not None:
+            cursor.execute('''
+                UPDATE guests
+                SET attending = ?, allergies = ?, companion_names = ?
+                WHERE uuid = ?
+            ''', (int(attending), allergies, json.dumps(companion_names), guest_uuid))
+        else:
+            cursor.execute('''
+                UPDATE guests
+                SET attending = ?, allergies = ?
+                WHERE uuid = ?
+            ''', (int(attending), allergies, guest_uuid))
+
+        if cursor.rowcount == 0:
+            raise ValueError("Guest not found")
+
+        cursor.execute(f'SELECT {GUEST_COLUMNS} FROM guests WHERE uuid = ?', (guest_uuid,))
+        return _guest_from_row(cursor.fetchone())
+
+def get_all_guests():
+    """Gets all guests ordered by first name"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT {GUEST_COLUMNS}
+            FROM guests
+            ORDER BY first_name ASC, last_name ASC
+        ''')
+        return [_guest_from_row(row) for row in cursor.fetchall()]
+
+def iter_guests_for_links(only_pending=False):
+    """Streams the guests needed to build invitation links, ordered by id.
+    Rows are read from the cursor as they are consumed, not all at once."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, uuid, first_name, nickname, phone, companion_names, group_name
+            FROM guests
+            WHERE link_generated = 0 OR NOT ?
+            ORDER BY id
+        ''', (int(bool(only_pending)),))
+        for row in cursor:
+            guest = dict(row)
+            guest['companion_names'] = json.loads(guest['companion_names'] or '[]')
+            yield guest
+
+def mark_links_generated(guest_ids):
+    """Sets link_generated on the given guests with a single UPDATE.
+    Returns how many guests changed (already marked ones are not rewritten)."""
+    if not guest_ids:
+        return 0
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        # The ids travel as one JSON array: no limit on bound parameters
+        cursor.execute('''
+            UPDATE guests
+            SET link_generated = 1
+            WHERE id IN (SELECT value FROM json_each(?)) AND link_generated = 0
+        ''', (json.dumps(list(guest_ids)),))
+        return cursor.rowcount
+
+def _insert_guests(cursor, guests):
+    """Inserts guests (dicts with create_guest()'s arguments); returns their ids"""
+    ids = []
+    for guest in guests:
+        cursor.execute('''
+            INSERT INTO guests (
+                uuid, first_name, last_name, nickname, phone,
+                companion_names, group_name, attending, allergies,
+                link_generated, link_sent
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            str(uuid_module.uuid4()),
+            guest['first_name'],
+            guest.get('last_name'),
+            guest.get('nickname'),
+            guest.get('phone'),
+            json.dumps(guest.get('companion_names') or []),
+            guest.get('group_name'),
+            _guest_column_value('attending', guest.get('attending')),
+            guest.get('allergies'),
+            int(bool(guest.get('link_generated', False))),
+            int(bool(guest.get('link_sent', False))),
+        ))
+        ids.append(cursor.lastrowid)
+    return ids
+
+def _select_guests(cursor, guest_ids):
+    """Gets the given guests, in the order of guest_ids"""
+    rows = {}
+    # Stay well below SQLite's limit of bound parameters per statement
+    for start in range(0, len(guest_ids), 500):
+        chunk = guest_ids[start:start + 500]
+        cursor.execute(
+            f'SELECT {GUEST_COLUMNS} FROM guests WHERE id IN ({", ".join("?" * len(chunk))})',
+            chunk
+        )
+        for row in cursor.fetchall():
+            rows[row['id']] = _guest_from_row(row)
+    return [rows[guest_id] for guest_id in guest_ids if guest_id in rows]
+
+def create_guest(
+    first_name,
+    last_name=None,
+    nickname=None,
+    phone=None,
+    companion_names=None,
+    group_name=None,
+    attending=None,
+    allergies=None,
+    link_generated=False,
+    link_sent=False,
+):
+    """Creates a new guest"""
+    guest = {
+        'first_name': first_name,
+        'last_name': last_name,
+        'nickname': nickname,
+        'phone': phone,
+        'companion_names': companion_names,
+        'group_name': group_name,
+        'attending': attending,
+        'allergies': allergies,
+        'link_generated': link_generated,
+        'link_sent': link_sent,
+    }
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        ids = _insert_guests(cursor, [guest])
+        return _select_guests(cursor, ids)[0]
+
+def bulk_create_guests(guests):
+    """Creates many guests in one transaction. Returns them in input order."""
+    if not guests:
+        return []
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        ids = _insert_guests(cursor, guests)
+        return _select_guests(cursor, ids)
+
+def update_guest(guest_id, **fields):
+    """Updates only the given columns of an existing guest.
+    Rows whose values are all unchanged are not rewritten. Returns the guest."""
+    _check_guest_fields(fields)
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        if fields:
+            columns = sorted(fields)
+            values = [_guest_column_value(c, fields[c]) for c in columns]
+            assignments = ', '.join(f'{c} = ?' for c in columns)
+            changed = ' OR '.join(f'{c} IS NOT ?' for c in columns)
+            cursor.execute(
+                f'UPDATE guests SET {assignments} WHERE id = ? AND ({changed})',
+                values + [guest_id] + values
+            )
+
+        guests = _select_guests(cursor, [guest_id])
+        if not guests:
+            raise ValueError(f"Guest with id {guest_id} not found")
+        return guests[0]
+
+def bulk_update_guests(updates):
+    """Applies partial updates to many guests in one transaction.
+    `updates` is a list of (guest_id, fields). Returns (updated_guests, missing_ids)."""
+    guest_ids = [guest_id for guest_id, _ in updates]
+    if len(set(guest_ids)) != len(guest_ids):
+        raise ValueError("Each guest id may appear only once per batch")
+    for _, fields in updates:
+        _check_guest_fields(fields)
+
+    requested_ids = [guest_id for guest_id, fields in updates if fields]
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for guest_id, fields in updates:
+            if not fields:
+                continue
+            columns = sorted(fields)
+            cursor.execute(
+                f"UPDATE guests SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ?",
+                [_guest_column_value(c, fields[c]) for c in columns] + [guest_id]
+            )
+        updated = _select_guests(cursor, requested_ids)
+
+    found = {guest['id'] for guest in updated}
+    return updated, [guest_id for guest_id in requested_ids if guest_id not in found]
+
+def delete_guest(guest_id):
+    """Deletes a guest by ID"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM guests WHERE id = ?', (guest_id,))
+
+        if cursor.rowcount == 0:
+            raise ValueError(f"Guest with id {guest_id} not found")
+
+        return True
@@ -32,6 +32,15 @@ def flush_database():
         
         # Delete all rows from each table
         for table in tables:
+            if table == 'schema_version':
+                # Keep the applied migrations, or init_db() would run them again
+                print(f"✓ {table}: Kept")
+                continue
+            if table == 'content_versions':
+                # Keep the counters and bump them, so cached ETags stop matching
+                cursor.execute('UPDATE content_versions SET version = version + 1')
+                print(f"✓ {table}: Bumped {cursor.rowcount} version(s)")
+                continue
             cursor.execute(f'DELETE FROM {table}')
             deleted_count = cursor.rowcount
             print(f"✓ {table}: Deleted {deleted_count} row(s)")
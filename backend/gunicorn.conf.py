@@ -0,0 +1,52 @@
+"""
+Gunicorn settings for serving the Flask backend in production:
+
+    cd backend
+    gunicorn -c gunicorn.conf.py app:app
+
+The app (and with it the database schema, see init_db() in app.py) is loaded
+once in the master process before the workers are forked. Each worker serves
+requests from a small thread pool; SQLite in WAL mode lets those threads and
+processes read concurrently while one of them writes.
+
+Graceful restart: `kill -HUP <master pid>` starts new workers and lets the old
+ones finish in-flight requests (up to graceful_timeout). Because the app is
+preloaded, code changes need a new master: `kill -USR2 <master pid>` starts
+one next to the old, then `kill -QUIT <old master pid>` once it is up.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5001')}"
+
+# Processes x threads. The default suits a small on-prem box; tune with env vars.
+workers = int(
+    os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8))
+)
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+
+# Import the app and migrate the schema once, before forking
+preload_app = True
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+# Recycle workers now and then so slow leaks cannot build up
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = max_requests // 10
+
+# Gunicorn's own access log is off: app.py writes a sampled one (access_log.py)
+accesslog = None
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    # init_db() ran in the master; database connections (and the Postgres
+    # pool's threads) must not be shared with forked children, so close
+    # them before any worker starts.
+    import _storage
+
+    _storage.close_db()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mide el rendimiento de la generación de enlaces wa.me sobre un CSV sintético.
+Compara el método anterior (replace + quote del mensaje completo por fila) con
+las plantillas precodificadas de save_the_date.py, y verifica que ambos
+producen exactamente los mismos enlaces.
+Uso: python benchmark_links.py [--filas 100000] [--semilla 42]
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import random
+import tempfile
+import time
+import urllib.parse
+
+from save_the_date import (
+    LINK_AL_FINAL,
+    MENSAJE_GRUPO,
+    MENSAJE_INVITADO_SOLO,
+    MENSAJE_PLUS_ONE,
+    detectar_columnas,
+    es_true,
+    generar_filas_salida,
+    indexar_telefonos_por_grupo,
+    leer_encabezados,
+    leer_filas,
+    nombre_mostrar,
+    normalizar_telefono,
+)
+
+ENCABEZADOS = [
+    "",
+    "Nombre",
+    "Apellidos",
+    "Apodo",
+    "Telefono",
+    "Tiene Plus One Sin Nombre",
+    "Nombre unico de grupo (Si queremos mandar el mensaje en grupo)",
+]
+NOMBRES = ["María José", "Andrés", "Begoña", "Íñigo", "Lucía", "Ramón", "Zoë", "Chloé"]
+APELLIDOS = ["Muñoz", "Pérez", "García", "O'Neill", "Restrepo", "Trujillo"]
+
+
+def escribir_csv_sintetico(ruta: str, filas: int, semilla: int) -> None:
+    """CSV con la misma forma que input.csv: ~20% de filas en grupos,
+    ~30% con apodo, plus ones y algunos teléfonos vacíos."""
+    rnd = random.Random(semilla)
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(ENCABEZADOS)
+        for i in range(filas):
+            grupo = (
+                f"Familia {rnd.randint(1, filas // 30 or 1)}"
+                if rnd.random() < 0.2
+                else ""
+            )
+            telefono = (
+                "" if rnd.random() < 0.05 else str(rnd.randint(600000000, 699999999))
+            )
+            writer.writerow(
+                [
+                    rnd.choice(["Nico", "Caro"]),
+                    f"{rnd.choice(NOMBRES)} {i}",
+                    rnd.choice(APELLIDOS),
+                    rnd.choice(NOMBRES) if rnd.random() < 0.3 else "",
+                    telefono,
+                    "TRUE" if rnd.random() < 0.15 else "FALSE",
+                    grupo,
+                ]
+            )
+
+
+def enlaces_sin_precodificar(filas, cols, primer_telefono_por_grupo):
+    """Referencia: el método anterior, que codifica el mensaje completo en cada fila."""
+    grupos_ya_escritos: set[str] = set()
+    for row in filas:
+        nombre_grupo = (row.get(cols["nombre_grupo"]) or "").strip()
+        if nombre_grupo:
+            if nombre_grupo in grupos_ya_escritos:
+                continue
+            grupos_ya_escritos.add(nombre_grupo)
+            phone = primer_telefono_por_grupo.get(nombre_grupo, "")
+            texto = MENSAJE_GRUPO.replace("(nombre del grupo)", nombre_grupo)
+        else:
+            phone = normalizar_telefono(row.get(cols["telefono"], ""))
+            nombre_display, _ = nombre_mostrar(
+                row.get(cols["nombre"], "").strip(),
+                row.get(cols["apellido"], "").strip(),
+                row.get(cols["apodo"], "").strip(),
+            )
+            plantilla = (
+                MENSAJE_PLUS_ONE
+                if es_true(row.get(cols["plus_one_sin_nombre"], ""))
+                else MENSAJE_INVITADO_SOLO
+            )
+            texto = plantilla.replace("(nombre del invitado)", nombre_display)
+        encoded = urllib.parse.quote(
+            texto + "\n\n" + LINK_AL_FINAL, encoding="utf-8", safe=""
+        )
+        yield f"https://wa.me/{phone}?text={encoded}" if phone else ""
+
+
+def medir(nombre: str, enlaces) -> tuple[float, int, str]:
+    digest = hashlib.blake2b(digest_size=16)
+    cantidad = 0
+    inicio = time.perf_counter()
+    for enlace in enlaces:
+        digest.update(enlace.encode("utf-8"))
+        digest.update(b"\n")
+        cantidad += 1
+    segundos = time.perf_counter() - inicio
+    print(
+        f"{nombre:<28} {cantidad:>8} enlaces  {segundos:7.2f} s  {cantidad / segundos:>10,.0f} enlaces/s"
+    )
+    return segundos, cantidad, digest.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark de generación de enlaces wa.me"
+    )
+    parser.add_argument(
+        "--filas", type=int, default=100_000, help="Filas del CSV sintético"
+    )
+    parser.add_argument("--semilla", type=int, default=42, help="Semilla aleatoria")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "sintetico.csv")
+        escribir_csv_sintetico(ruta, args.filas, args.semilla)
+        cols = detectar_columnas(leer_encabezados(ruta)[0])
+        telefonos = indexar_telefonos_por_grupo(leer_filas(ruta), cols)
+        print(f"CSV sintético: {args.filas} filas, {len(telefonos)} grupos\n")
+
+        antes, _, digest_antes = medir(
+            "replace + quote por fila",
+            enlaces_sin_precodificar(leer_filas(ruta), cols, telefonos),
+        )
+        despues, _, digest_despues = medir(
+            "plantillas precodificadas",
+            (
+                fila["wa_link"]
+                for fila in generar_filas_salida(
+                    leer_filas(ruta),
+                    cols,
+                    MENSAJE_INVITADO_SOLO,
+                    MENSAJE_PLUS_ONE,
+                    MENSAJE_GRUPO,
+                    telefonos,
+                )
+            ),
+        )
+
+    if digest_antes != digest_despues:
+        raise SystemExit("Error: los enlaces generados no coinciden")
+    print(f"\nMismos enlaces en ambos métodos; {antes / despues:.1f}x más rápido")
+
+
+if __name__ == "__main__":
+    main()
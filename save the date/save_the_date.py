@@ -6,13 +6,28 @@ Columnas: nombre, apellido, apodo (opcional), telefono, Tiene Plus One Sin Nombr
 Nombre unico de grupo (si hay valor = mensaje en grupo, un solo wa.me por grupo).
 Tres mensajes: normal, plus one, grupo.
 Uso: python save_the_date.py input.csv output.csv [mensaje] [mensaje_plus_one] [mensaje_grupo]
+     [--workers N]
+El CSV se procesa fila a fila, así que la memoria no crece con su tamaño.
+Con --workers N los enlaces se generan en N procesos, por bloques, y la salida
+mantiene el orden del CSV.
+Con --incremental solo se regeneran los enlaces de filas nuevas o cambiadas desde
+la ejecución anterior, y se listan en <salida>.cambios.csv para reenviar solo a
+esos invitados.
+Con --desde-db SALIDA_CSV los enlaces de invitación (página personal por uuid +
+wa.me) se generan desde la tabla guests en lugar del CSV, y se marca link_generated.
 """
 
 import argparse
 import csv
+import hashlib
+import io
+import itertools
+import os
 import re
 import sys
 import urllib.parse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 
 def normalizar_telefono(telefono: str) -> str:
@@ -119,6 +134,48 @@ def detectar_columnas(row_keys: list[str]) -> dict[str, str]:
     }
 
 
+def fila_a_invitado(row: dict[str, str], cols: dict[str, str]) -> dict | None:
+    """Convierte una fila del CSV en un invitado con los campos de la tabla guests.
+    Devuelve None si la fila no tiene nombre."""
+    nombre = (row.get(cols["nombre"]) or "").strip()
+    if not nombre:
+        return None
+
+    def valor(clave: str) -> str | None:
+        columna = cols.get(clave)
+        if not columna:
+            return None
+        return (row.get(columna) or "").strip() or None
+
+    tiene_plus_one = (
+        es_true(row.get(cols["plus_one_sin_nombre"], ""))
+        if cols.get("plus_one_sin_nombre")
+        else False
+    )
+    return {
+        "first_name": nombre,
+        "last_name": valor("apellido"),
+        "nickname": valor("apodo"),
+        "phone": normalizar_telefono(row.get(cols["telefono"], "")) or None,
+        # Un plus one sin nombre es un acompañante aún sin nombre
+        "companion_names": [""] if tiene_plus_one else [],
+        "group_name": valor("nombre_grupo"),
+    }
+
+
+def leer_invitados_csv(lineas) -> list[dict]:
+    """Lee un CSV de invitados (archivo o iterable de líneas) y devuelve las filas
+    convertidas con fila_a_invitado(), detectando las columnas automáticamente."""
+    reader = csv.DictReader(lineas)
+    cols = detectar_columnas(reader.fieldnames or [])
+    invitados = []
+    for row in reader:
+        invitado = fila_a_invitado(row, cols)
+        if invitado:
+            invitados.append(invitado)
+    return invitados
+
+
 def nombre_mostrar(nombre: str, apellido: str, apodo: str) -> tuple[str, str]:
     """Si hay apodo: solo apodo (nombre=apodo, apellido vacío). Si no: nombre + apellidos."""
     apodo = (apodo or "").strip()
@@ -131,8 +188,11 @@ def nombre_mostrar(nombre: str, apellido: str, apodo: str) -> tuple[str, str]:
 _ANILLO = "💍"  # 💍 anillo
 _SHUSH = "🤫"  # 🤫 cara callando
 
+# Sitio de la boda (las invitaciones son <sitio>/invitacion?uuid=...)
+URL_SITIO = "https://wedding-flax-two.vercel.app"
+
 # Link que se añade al final de cada mensaje
-LINK_AL_FINAL = "https://wedding-flax-two.vercel.app/cuando"
+LINK_AL_FINAL = f"{URL_SITIO}/cuando"
 
 MENSAJE_INVITADO_SOLO = f"""¡Hola, (nombre del invitado)! {_ANILLO}
 Se acerca el matrimonio de Nico & Caro, y queremos compartir contigo este momento tan especial.
@@ -153,6 +213,459 @@ La invitación oficial llegará próximamente con toda la información.
 Este es el número oficial del matrimonio, así que cualquier duda o mensaje puedes escribir con total confianza por este medio."""
 
 
+def indexar_grupos(
+    filas, cols: dict[str, str]
+) -> tuple[dict[str, str], dict[str, int]]:
+    """Primer teléfono válido de cada grupo y número de su primera fila (desde 0,
+    orden del CSV). Recorre las filas una a una sin guardarlas: la memoria crece
+    con la cantidad de grupos, no con la de filas."""
+    grupo_key = cols.get("nombre_grupo")
+    telefono_key = cols["telefono"]
+    primer_telefono_por_grupo: dict[str, str] = {}
+    primera_fila_por_grupo: dict[str, int] = {}
+    if not grupo_key:
+        return primer_telefono_por_grupo, primera_fila_por_grupo
+    for i, row in enumerate(filas):
+        nombre_grupo = (row.get(grupo_key) or "").strip()
+        if not nombre_grupo:
+            continue
+        primera_fila_por_grupo.setdefault(nombre_grupo, i)
+        if nombre_grupo in primer_telefono_por_grupo:
+            continue
+        phone = normalizar_telefono(row.get(telefono_key, ""))
+        if phone:
+            primer_telefono_por_grupo[nombre_grupo] = phone
+    return primer_telefono_por_grupo, primera_fila_por_grupo
+
+
+def indexar_telefonos_por_grupo(filas, cols: dict[str, str]) -> dict[str, str]:
+    """Primer teléfono válido de cada grupo (orden del CSV)."""
+    return indexar_grupos(filas, cols)[0]
+
+
+def describir_filas_salida(
+    filas, cols: dict[str, str], primer_telefono_por_grupo: dict[str, str]
+):
+    """Por cada fila de salida, en orden: (mensaje, nombre, apellido, teléfono,
+    datos del invitado). mensaje es "grupo", "plus_one" o "solo"; el nombre es
+    el que va en el placeholder; los datos son (nombre, apellido, apodo) tal como
+    vienen en el CSV, vacíos para un grupo.
+    Las filas de un grupo producen una sola salida, en la posición de la primera."""
+    nombre_key = cols["nombre"]
+    apellido_key = cols["apellido"]
+    apodo_key = cols.get("apodo")
+    telefono_key = cols["telefono"]
+    plus_one_key = cols.get("plus_one_sin_nombre")
+    grupo_key = cols.get("nombre_grupo")
+
+    grupos_ya_escritos: set[str] = set()
+
+    for row in filas:
+        nombre = row.get(nombre_key, "").strip()
+        apellido = row.get(apellido_key, "").strip()
+        apodo = row.get(apodo_key, "").strip() if apodo_key else ""
+        telefono = row.get(telefono_key, "")
+        tiene_plus_one = es_true(row.get(plus_one_key, "")) if plus_one_key else False
+        nombre_grupo = (row.get(grupo_key) or "").strip() if grupo_key else ""
+
+        # Si tiene nombre de grupo: un único wa.me por grupo (solo la primera vez que vemos el grupo)
+        if nombre_grupo:
+            if nombre_grupo in grupos_ya_escritos:
+                continue
+            grupos_ya_escritos.add(nombre_grupo)
+            phone_grupo = primer_telefono_por_grupo.get(nombre_grupo, "")
+            yield "grupo", nombre_grupo, "", phone_grupo, ("", "", "")
+            continue
+
+        # Sin grupo: mensaje normal o plus one, una fila por persona
+        phone = normalizar_telefono(telefono)
+        nombre_display, apellido_display = nombre_mostrar(nombre, apellido, apodo)
+        yield (
+            "plus_one" if tiene_plus_one else "solo",
+            nombre_display,
+            apellido_display,
+            phone,
+            (nombre, apellido, apodo),
+        )
+
+
+def compilar_mensajes(
+    mensaje: str, mensaje_plus_one: str, mensaje_grupo: str
+) -> dict[str, tuple[str, ...]]:
+    """Plantillas precodificadas de los tres mensajes (ver compilar_plantilla)."""
+    return {
+        "solo": compilar_plantilla(mensaje, "(nombre del invitado)"),
+        "plus_one": compilar_plantilla(mensaje_plus_one, "(nombre del invitado)"),
+        "grupo": compilar_plantilla(mensaje_grupo, "(nombre del grupo)"),
+    }
+
+
+def enlace_wa(phone: str, partes: tuple[str, ...], valor: str) -> str:
+    """Enlace wa.me con el mensaje ya codificado; vacío si no hay teléfono."""
+    if not phone:
+        return ""
+    return f"https://wa.me/{phone}?text=" + texto_codificado(partes, valor)
+
+
+def generar_filas_salida(
+    filas,
+    cols: dict[str, str],
+    mensaje: str,
+    mensaje_plus_one: str,
+    mensaje_grupo: str,
+    primer_telefono_por_grupo: dict[str, str],
+):
+    """Genera (nombre, apellido, wa_link) por cada fila de salida, en orden."""
+    partes = compilar_mensajes(mensaje, mensaje_plus_one, mensaje_grupo)
+    for tipo, nombre, apellido, phone, _ in describir_filas_salida(
+        filas, cols, primer_telefono_por_grupo
+    ):
+        yield {
+            "nombre": nombre,
+            "apellido": apellido,
+            "wa_link": enlace_wa(phone, partes[tipo], nombre),
+        }
+
+
+COLUMNAS_SALIDA = ["nombre", "apellido", "wa_link"]
+
+# Filas por bloque en el modo paralelo (--workers)
+TAMANO_BLOQUE = 5000
+
+# Parámetros de generación de cada proceso del pool (ver _iniciar_proceso)
+_parametros_proceso: tuple = ()
+
+
+def _iniciar_proceso(*parametros) -> None:
+    """Recibe una sola vez por proceso las columnas, los mensajes y los índices
+    de grupos, en lugar de enviarlos con cada bloque."""
+    global _parametros_proceso
+    _parametros_proceso = parametros
+
+
+def _procesar_bloque(bloque: tuple[int, list[dict[str, str]]]) -> tuple[int, str]:
+    """Filas de salida de un bloque que empieza en la fila `inicio` del CSV, ya
+    escritas como texto CSV (escribir el CSV cuesta más que generar los enlaces).
+    Cada grupo se escribe solo desde el bloque que contiene su primera fila."""
+    inicio, filas = bloque
+    cols, mensaje, mensaje_plus_one, mensaje_grupo, telefonos, primeras_filas = (
+        _parametros_proceso
+    )
+    grupo_key = cols.get("nombre_grupo")
+    if grupo_key:
+        filas = [
+            row
+            for i, row in enumerate(filas, inicio)
+            if primeras_filas.get((row.get(grupo_key) or "").strip(), i) == i
+        ]
+    texto = io.StringIO()
+    writer = csv.DictWriter(texto, fieldnames=COLUMNAS_SALIDA)
+    cantidad = 0
+    for fila in generar_filas_salida(
+        filas, cols, mensaje, mensaje_plus_one, mensaje_grupo, telefonos
+    ):
+        writer.writerow(fila)
+        cantidad += 1
+    return cantidad, texto.getvalue()
+
+
+def generar_bloques_csv_en_paralelo(
+    filas,
+    cols: dict[str, str],
+    mensaje: str,
+    mensaje_plus_one: str,
+    mensaje_grupo: str,
+    indices_grupos: tuple[dict[str, str], dict[str, int]],
+    workers: int,
+    tamano_bloque: int = TAMANO_BLOQUE,
+):
+    """Como generar_filas_salida(), pero en `workers` procesos y por bloques de
+    filas: devuelve (filas, texto CSV) de cada bloque en el orden del CSV.
+    Solo hay unos pocos bloques en vuelo a la vez, así que la memoria sigue
+    sin crecer con el tamaño del archivo."""
+    primer_telefono_por_grupo, primera_fila_por_grupo = indices_grupos
+    filas = iter(filas)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_iniciar_proceso,
+        initargs=(
+            cols,
+            mensaje,
+            mensaje_plus_one,
+            mensaje_grupo,
+            primer_telefono_por_grupo,
+            primera_fila_por_grupo,
+        ),
+    ) as pool:
+        en_vuelo: deque = deque()
+        inicio = 0
+        while bloque := list(itertools.islice(filas, tamano_bloque)):
+            en_vuelo.append(pool.submit(_procesar_bloque, (inicio, bloque)))
+            inicio += len(bloque)
+            if len(en_vuelo) >= workers * 2:
+                yield en_vuelo.popleft().result()
+        while en_vuelo:
+            yield en_vuelo.popleft().result()
+
+
+def version_plantilla(partes: tuple[str, ...]) -> str:
+    """Huella de una plantilla precodificada (texto y link final)."""
+    return hashlib.blake2b("\0".join(partes).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def hash_fila(version: str, tipo: str, phone: str, grupo: str, datos) -> str:
+    """Hash de todo lo que determina el enlace de una fila de salida: versión de
+    la plantilla, tipo de mensaje (plus one o no), teléfono, grupo y nombre,
+    apellido y apodo del invitado."""
+    campos = "\x1f".join((version, tipo, phone, grupo, *datos))
+    return hashlib.blake2b(campos.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def rutas_incrementales(ruta_salida: str) -> tuple[str, str]:
+    """Archivos del modo incremental junto a la salida: hashes y cambios."""
+    base, _ = os.path.splitext(ruta_salida)
+    return f"{base}.hashes.csv", f"{base}.cambios.csv"
+
+
+def leer_estado(ruta_salida: str, ruta_hashes: str) -> dict[str, tuple[str, dict]]:
+    """Salida anterior por clave: clave -> (hash, fila de salida). Las filas de
+    la salida y de los hashes van en el mismo orden. Sin salida anterior (o si
+    no cuadran) devuelve {} y todas las filas se tratan como nuevas."""
+    try:
+        with open(ruta_salida, newline="", encoding="utf-8") as salida, open(
+            ruta_hashes, newline="", encoding="utf-8"
+        ) as hashes:
+            anteriores = {}
+            for fila, estado in itertools.zip_longest(
+                csv.DictReader(salida), csv.DictReader(hashes)
+            ):
+                if fila is None or estado is None:
+                    print(
+                        f"Aviso: '{ruta_hashes}' no corresponde a '{ruta_salida}'; "
+                        "se regeneran todos los enlaces",
+                        file=sys.stderr,
+                    )
+                    return {}
+                anteriores[estado["clave"]] = (estado["hash"], fila)
+            return anteriores
+    except FileNotFoundError:
+        return {}
+
+
+def generar_filas_incrementales(
+    filas,
+    cols: dict[str, str],
+    mensaje: str,
+    mensaje_plus_one: str,
+    mensaje_grupo: str,
+    primer_telefono_por_grupo: dict[str, str],
+    anteriores: dict[str, tuple[str, dict]],
+):
+    """Como generar_filas_salida(), pero reutiliza el enlace de `anteriores`
+    (ver leer_estado) cuando el hash de la fila no cambió, y solo codifica las
+    filas nuevas o cambiadas. Genera (clave, hash, fila, estado) con estado
+    "nueva", "cambiada" o "igual". La clave identifica la fila entre ejecuciones:
+    el nombre del grupo, o nombre y apellido del invitado (con #2, #3... si se
+    repiten)."""
+    partes = compilar_mensajes(mensaje, mensaje_plus_one, mensaje_grupo)
+    versiones = {tipo: version_plantilla(p) for tipo, p in partes.items()}
+    veces_por_clave: dict[str, int] = {}
+
+    for tipo, nombre, apellido, phone, datos in describir_filas_salida(
+        filas, cols, primer_telefono_por_grupo
+    ):
+        grupo = nombre if tipo == "grupo" else ""
+        clave = (
+            f"grupo:{grupo}" if grupo else f"invitado:{datos[0]} {datos[1]}".rstrip()
+        )
+        veces = veces_por_clave.get(clave, 0) + 1
+        veces_por_clave[clave] = veces
+        if veces > 1:
+            clave = f"{clave}#{veces}"
+
+        hash_actual = hash_fila(versiones[tipo], tipo, phone, grupo, datos)
+        anterior = anteriores.get(clave)
+        if anterior and anterior[0] == hash_actual:
+            yield clave, hash_actual, anterior[1], "igual"
+            continue
+        fila = {
+            "nombre": nombre,
+            "apellido": apellido,
+            "wa_link": enlace_wa(phone, partes[tipo], nombre),
+        }
+        yield clave, hash_actual, fila, "cambiada" if anterior else "nueva"
+
+
+def escribir_salida_incremental(
+    ruta_entrada: str,
+    ruta_salida: str,
+    cols: dict[str, str],
+    mensajes: tuple[str, str, str],
+    primer_telefono_por_grupo: dict[str, str],
+) -> dict[str, int]:
+    """Reescribe la salida y sus hashes regenerando solo los enlaces que cambian,
+    y deja en el archivo de cambios las filas nuevas, cambiadas y eliminadas
+    (a quienes hay que reenviar, o no, el mensaje). La salida anterior se
+    mantiene en memoria. Devuelve cuántas filas hay de cada estado."""
+    ruta_hashes, ruta_cambios = rutas_incrementales(ruta_salida)
+    anteriores = leer_estado(ruta_salida, ruta_hashes)
+    conteo = {"nueva": 0, "cambiada": 0, "igual": 0, "eliminada": 0}
+    claves_vistas: set[str] = set()
+
+    # Salida y hashes se escriben aparte y se reemplazan juntos al final, para
+    # no dejarlos desparejados si algo falla a mitad
+    with open(ruta_salida + ".tmp", "w", newline="", encoding="utf-8") as outfile, open(
+        ruta_hashes + ".tmp", "w", newline="", encoding="utf-8"
+    ) as hashfile, open(ruta_cambios, "w", newline="", encoding="utf-8") as cambiosfile:
+        writer = csv.DictWriter(outfile, fieldnames=COLUMNAS_SALIDA)
+        writer.writeheader()
+        hash_writer = csv.writer(hashfile)
+        hash_writer.writerow(["clave", "hash"])
+        cambios_writer = csv.DictWriter(
+            cambiosfile, fieldnames=["estado", *COLUMNAS_SALIDA]
+        )
+        cambios_writer.writeheader()
+
+        for clave, hash_actual, fila, estado in generar_filas_incrementales(
+            leer_filas(ruta_entrada),
+            cols,
+            *mensajes,
+            primer_telefono_por_grupo,
+            anteriores,
+        ):
+            writer.writerow(fila)
+            hash_writer.writerow([clave, hash_actual])
+            claves_vistas.add(clave)
+            conteo[estado] += 1
+            if estado != "igual":
+                cambios_writer.writerow({"estado": estado, **fila})
+
+        for clave, (_, fila) in anteriores.items():
+            if clave not in claves_vistas:
+                conteo["eliminada"] += 1
+                cambios_writer.writerow({"estado": "eliminada", **fila})
+
+    os.replace(ruta_salida + ".tmp", ruta_salida)
+    os.replace(ruta_hashes + ".tmp", ruta_hashes)
+    return conteo
+
+
+# Caracteres que encodeURIComponent() deja sin codificar: los enlaces quedan
+# iguales a los que copia la página Manager
+_SEGUROS_URI_COMPONENT = "!~*'()"
+
+COLUMNAS_SALIDA_DB = ["uuid", "nombre", "invitacion", "wa_link"]
+
+
+def nombre_saludo(invitado: dict) -> str:
+    """Nombre del saludo, como getGreetingName() en Manager.jsx: el grupo, o el
+    apodo (o nombre) seguido de los acompañantes que ya tienen nombre."""
+    if invitado.get("group_name"):
+        return invitado["group_name"]
+    propio = invitado.get("nickname") or invitado["first_name"]
+    acompanantes = [
+        nombre for nombre in invitado.get("companion_names") or [] if nombre
+    ]
+    if acompanantes:
+        return f"{propio} y {', '.join(acompanantes)}"
+    return propio
+
+
+def url_invitacion(invitado: dict, url_sitio: str = URL_SITIO) -> str:
+    """Página de invitación personal del invitado (por su uuid)."""
+    return f"{url_sitio.rstrip('/')}/invitacion?uuid={invitado['uuid']}"
+
+
+def enlace_invitacion(invitado: dict, url_sitio: str = URL_SITIO) -> str:
+    """Enlace de WhatsApp con el mensaje de invitación, como buildGuestMessage()
+    y handleCopyGuestMessage() en Manager.jsx: wa.me al teléfono del invitado, o
+    api.whatsapp.com/send si no tiene."""
+    mensaje = f"Hola {nombre_saludo(invitado)}"
+    if any(not nombre for nombre in invitado.get("companion_names") or []):
+        mensaje += " puedes llevar un +1"
+    mensaje += " " + url_invitacion(invitado, url_sitio)
+    texto = urllib.parse.quote(mensaje, encoding="utf-8", safe=_SEGUROS_URI_COMPONENT)
+    digitos = re.sub(r"\D", "", invitado.get("phone") or "")
+    if digitos:
+        return f"https://wa.me/{digitos}?text={texto}"
+    return f"https://api.whatsapp.com/send?text={texto}"
+
+
+def enlaces_invitados(invitados, url_sitio: str = URL_SITIO):
+    """Genera los enlaces de cada invitado (filas de la tabla guests), en orden:
+    {"id", "uuid", "name", "invitation_url", "wa_link"}, la forma que devuelve
+    POST /api/admin/guests/links."""
+    for invitado in invitados:
+        yield {
+            "id": invitado["id"],
+            "uuid": str(invitado["uuid"]),
+            "name": nombre_saludo(invitado),
+            "invitation_url": url_invitacion(invitado, url_sitio),
+            "wa_link": enlace_invitacion(invitado, url_sitio),
+        }
+
+
+def escribir_enlaces_desde_db(
+    ruta_salida: str, solo_pendientes: bool, url_sitio: str
+) -> tuple[int, int]:
+    """Escribe el enlace de invitación de cada invitado de la tabla guests,
+    leyéndolos en streaming (cursor del lado del servidor en Postgres), y marca
+    link_generated en todos ellos con un solo UPDATE al terminar.
+    Devuelve (enlaces escritos, invitados marcados)."""
+    # La interfaz de almacenamiento (Postgres o SQLite) vive en api/_storage.py
+    sys.path.append(
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api")
+    )
+    from _storage import iter_guests_for_links, mark_links_generated
+
+    ids: list[int] = []
+    with open(ruta_salida, "w", newline="", encoding="utf-8") as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=COLUMNAS_SALIDA_DB)
+        writer.writeheader()
+        for enlace in enlaces_invitados(
+            iter_guests_for_links(only_pending=solo_pendientes), url_sitio
+        ):
+            writer.writerow(
+                {
+                    "uuid": enlace["uuid"],
+                    "nombre": enlace["name"],
+                    "invitacion": enlace["invitation_url"],
+                    "wa_link": enlace["wa_link"],
+                }
+            )
+            ids.append(enlace["id"])
+    return len(ids), mark_links_generated(ids)
+
+
+def leer_filas(ruta: str):
+    """Lee el CSV fila a fila (sin cargarlo entero en memoria)."""
+    with open(ruta, newline="", encoding="utf-8") as infile:
+        yield from csv.DictReader(infile)
+
+
+def leer_encabezados(ruta: str) -> tuple[list[str], bool]:
+    """Encabezados del CSV y si tiene al menos una fila de datos."""
+    with open(ruta, newline="", encoding="utf-8") as infile:
+        reader = csv.DictReader(infile)
+        primera = next(reader, None)
+        return list(reader.fieldnames or []), primera is not None
+
+
+def compilar_plantilla(plantilla: str, placeholder: str) -> tuple[str, ...]:
+    """Parte el mensaje completo (plantilla + link final) en el placeholder y
+    codifica cada parte fija una sola vez. quote() trabaja carácter a carácter,
+    así que codificar por partes da el mismo resultado que codificar el todo."""
+    partes = (plantilla + "\n\n" + LINK_AL_FINAL).split(placeholder)
+    return tuple(
+        urllib.parse.quote(parte, encoding="utf-8", safe="") for parte in partes
+    )
+
+
+def texto_codificado(partes: tuple[str, ...], valor: str) -> str:
+    """Mensaje codificado para wa.me: solo se codifica el valor del placeholder."""
+    return urllib.parse.quote(valor, encoding="utf-8", safe="").join(partes)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Genera CSV con nombre, apellido y enlace wa.me"
@@ -187,112 +700,103 @@ def main():
         default=MENSAJE_GRUPO,
         help="Mensaje para grupo. Usa (nombre del grupo) como placeholder (opcional)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Procesos para generar los enlaces por bloques (0 = uno por CPU; default: 1)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Regenera solo los enlaces de filas nuevas o cambiadas desde la última ejecución "
+        "(guarda <salida>.hashes.csv y lista los cambios en <salida>.cambios.csv)",
+    )
+    parser.add_argument(
+        "--desde-db",
+        metavar="SALIDA_CSV",
+        help="En lugar de leer el CSV de invitados, escribe en SALIDA_CSV los enlaces de invitación "
+        "de la tabla guests (uuid, nombre, invitacion, wa_link) y marca link_generated",
+    )
+    parser.add_argument(
+        "--solo-pendientes",
+        action="store_true",
+        help="Con --desde-db, solo los invitados que aún no tienen link_generated",
+    )
+    parser.add_argument(
+        "--url-sitio",
+        default=URL_SITIO,
+        help=f"Con --desde-db, sitio de las páginas de invitación (default: {URL_SITIO})",
+    )
     args = parser.parse_args()
+    if args.workers < 0:
+        parser.error("--workers no puede ser negativo")
+    if args.incremental and args.workers != 1:
+        parser.error("--incremental no se puede combinar con --workers")
+    if args.desde_db and (args.incremental or args.workers != 1):
+        parser.error("--desde-db no se puede combinar con --incremental ni --workers")
+    if args.solo_pendientes and not args.desde_db:
+        parser.error("--solo-pendientes requiere --desde-db")
+    workers = args.workers or os.cpu_count() or 1
+
+    if args.desde_db:
+        escritos, marcados = escribir_enlaces_desde_db(
+            args.desde_db, args.solo_pendientes, args.url_sitio
+        )
+        print(
+            f"Listo: {escritos} enlaces escritos en '{args.desde_db}' "
+            f"({marcados} invitados marcados con link_generated)"
+        )
+        return
 
     try:
-        with open(args.input_csv, newline="", encoding="utf-8") as infile:
-            reader = csv.DictReader(infile)
-            rows = list(reader)
-            if not rows:
-                print("El CSV de entrada está vacío.", file=sys.stderr)
-                sys.exit(1)
-            fieldnames_in = reader.fieldnames or list(rows[0].keys())
+        fieldnames_in, hay_filas = leer_encabezados(args.input_csv)
     except FileNotFoundError:
         print(f"Error: no se encontró el archivo '{args.input_csv}'", file=sys.stderr)
         sys.exit(1)
+    if not hay_filas:
+        print("El CSV de entrada está vacío.", file=sys.stderr)
+        sys.exit(1)
 
     cols = detectar_columnas(fieldnames_in)
-    nombre_key = cols["nombre"]
-    apellido_key = cols["apellido"]
-    apodo_key = cols.get("apodo")
-    telefono_key = cols["telefono"]
-    plus_one_key = cols.get("plus_one_sin_nombre")
-    grupo_key = cols.get("nombre_grupo")
 
-    out_fieldnames = ["nombre", "apellido", "wa_link"]
+    # Dos lecturas en streaming: la primera solo indexa el teléfono de cada grupo
+    # (el grupo se escribe en su primera fila, pero su teléfono puede venir después)
+    # y en qué fila aparece por primera vez (con --workers, el bloque que la
+    # contiene es el único que escribe el grupo)
+    indices_grupos = indexar_grupos(leer_filas(args.input_csv), cols)
+    mensajes = (args.mensaje, args.mensaje_plus_one, args.mensaje_grupo)
+
+    if args.incremental:
+        conteo = escribir_salida_incremental(
+            args.input_csv, args.output_csv, cols, mensajes, indices_grupos[0]
+        )
+        filas_escritas = conteo["nueva"] + conteo["cambiada"] + conteo["igual"]
+        print(f"Listo: {filas_escritas} filas escritas en '{args.output_csv}'")
+        print(
+            f"{conteo['nueva']} nuevas, {conteo['cambiada']} cambiadas, "
+            f"{conteo['igual']} sin cambios, {conteo['eliminada']} eliminadas "
+            f"(detalle en '{rutas_incrementales(args.output_csv)[1]}')"
+        )
+        return
 
-    # Por cada nombre de grupo, guardar el primer teléfono válido que encontremos (orden del CSV)
-    primer_telefono_por_grupo: dict[str, str] = {}
-    if grupo_key:
-        for row in rows:
-            nombre_grupo = (row.get(grupo_key) or "").strip()
-            if not nombre_grupo:
-                continue
-            if nombre_grupo in primer_telefono_por_grupo:
-                continue
-            phone = normalizar_telefono(row.get(telefono_key, ""))
-            if phone:
-                primer_telefono_por_grupo[nombre_grupo] = phone
-
-    grupos_ya_escritos: set[str] = set()
     filas_escritas = 0
-
     with open(args.output_csv, "w", newline="", encoding="utf-8") as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=out_fieldnames)
+        writer = csv.DictWriter(outfile, fieldnames=COLUMNAS_SALIDA)
         writer.writeheader()
 
-        for row in rows:
-            nombre = row.get(nombre_key, "").strip()
-            apellido = row.get(apellido_key, "").strip()
-            apodo = row.get(apodo_key, "").strip() if apodo_key else ""
-            telefono = row.get(telefono_key, "")
-            tiene_plus_one = (
-                es_true(row.get(plus_one_key, "")) if plus_one_key else False
-            )
-            nombre_grupo = (row.get(grupo_key) or "").strip() if grupo_key else ""
-
-            phone = normalizar_telefono(telefono)
-
-            # Si tiene nombre de grupo: un único wa.me por grupo (solo la primera vez que vemos el grupo)
-            if nombre_grupo:
-                if nombre_grupo in grupos_ya_escritos:
-                    continue
-                grupos_ya_escritos.add(nombre_grupo)
-                phone_grupo = primer_telefono_por_grupo.get(nombre_grupo, "")
-                mensaje_grupo_final = (
-                    args.mensaje_grupo.replace("(nombre del grupo)", nombre_grupo)
-                    + "\n\n"
-                    + LINK_AL_FINAL
-                )
-                mensaje_grupo_encoded = urllib.parse.quote(
-                    mensaje_grupo_final, encoding="utf-8", safe=""
-                )
-                wa_link = (
-                    f"https://wa.me/{phone_grupo}?text={mensaje_grupo_encoded}"
-                    if phone_grupo
-                    else ""
-                )
-                writer.writerow(
-                    {
-                        "nombre": nombre_grupo,
-                        "apellido": "",
-                        "wa_link": wa_link,
-                    }
-                )
+        if workers > 1:
+            for cantidad, texto in generar_bloques_csv_en_paralelo(
+                leer_filas(args.input_csv), cols, *mensajes, indices_grupos, workers
+            ):
+                outfile.write(texto)
+                filas_escritas += cantidad
+        else:
+            for fila in generar_filas_salida(
+                leer_filas(args.input_csv), cols, *mensajes, indices_grupos[0]
+            ):
+                writer.writerow(fila)
                 filas_escritas += 1
-                continue
-
-            # Sin grupo: mensaje normal o plus one, una fila por persona
-            nombre_display, apellido_display = nombre_mostrar(nombre, apellido, apodo)
-            plantilla = args.mensaje_plus_one if tiene_plus_one else args.mensaje
-            mensaje_final = (
-                plantilla.replace("(nombre del invitado)", nombre_display)
-                + "\n\n"
-                + LINK_AL_FINAL
-            )
-            mensaje_encoded = urllib.parse.quote(
-                mensaje_final, encoding="utf-8", safe=""
-            )
-            wa_link = f"https://wa.me/{phone}?text={mensaje_encoded}" if phone else ""
-
-            writer.writerow(
-                {
-                    "nombre": nombre_display,
-                    "apellido": apellido_display,
-                    "wa_link": wa_link,
-                }
-            )
-            filas_escritas += 1
 
     print(f"Listo: {filas_escritas} filas escritas en '{args.output_csv}'")
 
@@ -1,6 +1,11 @@
 import { useState, useEffect, Fragment } from "react";
 import { useNavigate, useParams } from "react-router-dom";
-import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
+import {
+  useQuery,
+  useInfiniteQuery,
+  useMutation,
+  useQueryClient,
+} from "@tanstack/react-query";
 import PageContainer from "../components/PageContainer";
 import styles from "./Manager.module.scss";
 
@@ -54,9 +59,16 @@ const deleteMessage = async (messageId) => {
   return response.json();
 };
 
-// API function for getting all scores
-const getAllScores = async () => {
-  const response = await fetch("/api/admin/scores");
+// API function for getting one page of the ranking; pass the previous page's
+// next_cursor to get the one after it
+const SCORES_PAGE_SIZE = 100;
+
+const getScoresPage = async ({ pageParam }) => {
+  const params = new URLSearchParams({ limit: SCORES_PAGE_SIZE });
+  if (pageParam) {
+    params.set("after", pageParam);
+  }
+  const response = await fetch(`/api/admin/scores?${params}`);
   if (!response.ok) {
     throw new Error("Failed to fetch scores");
   }
@@ -89,7 +101,7 @@ const createGuest = async (guestData) => {
 
 const updateGuest = async ({ guestId, guestData }) => {
   const response = await fetch(`/api/admin/guests/${guestId}`, {
-    method: "PUT",
+    method: "PATCH",
     headers: {
       "Content-Type": "application/json",
     },
@@ -113,6 +125,48 @@ const deleteGuest = async (guestId) => {
   return response.json();
 };
 
+// Builds the invitation links server-side and marks the guests as
+// link_generated with a single UPDATE (instead of one PUT per guest)
+const generateGuestLinks = async ({ onlyPending }) => {
+  const response = await fetch("/api/admin/guests/links", {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({
+      only_pending: onlyPending,
+      base_url: window.location.origin,
+    }),
+  });
+  if (!response.ok) {
+    const errorData = await response.json();
+    throw new Error(errorData.error || "Failed to generate guest links");
+  }
+  return response.json();
+};
+
+const downloadLinksCsv = (links) => {
+  const quote = (value) => `"${String(value).replace(/"/g, '""')}"`;
+  const rows = [
+    ["uuid", "nombre", "invitacion", "wa_link"],
+    ...links.map((link) => [
+      link.uuid,
+      link.name,
+      link.invitation_url,
+      link.wa_link,
+    ]),
+  ];
+  const csv = rows.map((row) => row.map(quote).join(",")).join("\r\n");
+  const url = URL.createObjectURL(
+    new Blob([csv], { type: "text/csv;charset=utf-8" })
+  );
+  const anchor = document.createElement("a");
+  anchor.href = url;
+  anchor.download = "links_invitados.csv";
+  anchor.click();
+  URL.revokeObjectURL(url);
+};
+
 const emptyGuestForm = {
   first_name: "",
   last_name: "",
@@ -146,6 +200,8 @@ function Manager() {
   const [guestModalMode, setGuestModalMode] = useState(null); // null | 'add' | 'edit'
   const [guestForm, setGuestForm] = useState(emptyGuestForm);
   const [editingGuestId, setEditingGuestId] = useState(null);
+  // Form values when the edit modal opened; only fields that differ are sent
+  const [editingGuestForm, setEditingGuestForm] = useState(null);
   const [deletingGuest, setDeletingGuest] = useState(null);
   const [highlightedGuestId, setHighlightedGuestId] = useState(null);
   const [copiedGuestId, setCopiedGuestId] = useState(null);
@@ -165,20 +221,28 @@ function Manager() {
     refetchOnWindowFocus: false, // Don't refetch when switching tabs
   });
 
-  // Query for all scores (ranking)
+  // Query for the ranking, one page at a time ("Load more" fetches the next)
   const {
-    data: scores = [],
+    data: scorePages,
     isLoading: isLoadingScores,
     refetch: refetchScores,
-  } = useQuery({
+    fetchNextPage: fetchMoreScores,
+    hasNextPage: hasMoreScores,
+    isFetchingNextPage: isFetchingMoreScores,
+  } = useInfiniteQuery({
     queryKey: ["admin", "scores"],
-    queryFn: getAllScores,
+    queryFn: getScoresPage,
+    initialPageParam: null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
     enabled: isAuthenticated, // Fetch as soon as Manager mounts, not just on this tab
     staleTime: 2 * 60 * 1000, // 2 minutes - scores don't change that often
     refetchInterval: 120000, // Refetch every 2 minutes (reduced from 30s)
     refetchOnWindowFocus: false, // Don't refetch when switching tabs
   });
 
+  // next_cursor is null on the last page (getNextPageParam then stops)
+  const scores = scorePages?.pages.flatMap((page) => page.scores) ?? [];
+
   // Query for all guests
   const {
     data: guests = [],
@@ -241,6 +305,18 @@ function Manager() {
     },
   });
 
+  const generateLinksMutation = useMutation({
+    mutationFn: generateGuestLinks,
+    onSuccess: ({ links }) => {
+      refetchGuests();
+      if (links.length) {
+        downloadLinksCsv(links);
+      }
+    },
+  });
+
+  const pendingLinks = guests.filter((guest) => !guest.link_generated).length;
+
   const openAddGuestModal = () => {
     setGuestForm(emptyGuestForm);
     setEditingGuestId(null);
@@ -248,7 +324,7 @@ function Manager() {
   };
 
   const openEditGuestModal = (guest) => {
-    setGuestForm({
+    const form = {
       first_name: guest.first_name || "",
       last_name: guest.last_name || "",
       nickname: guest.nickname || "",
@@ -262,7 +338,9 @@ function Manager() {
       allergies: guest.allergies || "",
       link_generated: guest.link_generated || false,
       link_sent: guest.link_sent || false,
-    });
+    };
+    setGuestForm(form);
+    setEditingGuestForm(form);
     setEditingGuestId(guest.id);
     setGuestModalMode("edit");
   };
@@ -270,6 +348,7 @@ function Manager() {
   const closeGuestModal = () => {
     setGuestModalMode(null);
     setEditingGuestId(null);
+    setEditingGuestForm(null);
     setGuestForm(emptyGuestForm);
   };
 
@@ -309,7 +388,18 @@ function Manager() {
     };
 
     if (guestModalMode === "edit" && editingGuestId) {
-      updateGuestMutation.mutate({ guestId: editingGuestId, guestData });
+      // PATCH only what the admin changed, so an RSVP (attending, allergies,
+      // companions) saved while the modal was open is not overwritten
+      const changedFields = Object.fromEntries(
+        Object.entries(guestData).filter(
+          ([field, value]) =>
+            JSON.stringify(value) !== JSON.stringify(editingGuestForm[field])
+        )
+      );
+      updateGuestMutation.mutate({
+        guestId: editingGuestId,
+        guestData: changedFields,
+      });
     } else {
       createGuestMutation.mutate(guestData);
     }
@@ -554,7 +644,8 @@ function Manager() {
             }`}
             onClick={() => setActiveTab("ranking")}
           >
-            🏆 Ranking ({scores.length})
+            🏆 Ranking ({scores.length}
+            {hasMoreScores ? "+" : ""})
           </button>
           <button
             className={`${styles.tab} ${
@@ -659,6 +750,15 @@ function Manager() {
                     ))}
                   </tbody>
                 </table>
+                {hasMoreScores && (
+                  <button
+                    className={styles.loadMoreButton}
+                    onClick={() => fetchMoreScores()}
+                    disabled={isFetchingMoreScores}
+                  >
+                    {isFetchingMoreScores ? "Loading..." : "Load more"}
+                  </button>
+                )}
               </div>
             )}
           </div>
@@ -704,12 +804,26 @@ function Manager() {
                   {guests.filter((g) => g.attending === null).length})
                 </button>
               </div>
-              <button
-                className={styles.addGuestButton}
-                onClick={openAddGuestModal}
-              >
-                + Agregar invitado
-              </button>
+              <div className={styles.guestsToolbarActions}>
+                <button
+                  className={styles.generateLinksButton}
+                  onClick={() =>
+                    generateLinksMutation.mutate({ onlyPending: true })
+                  }
+                  disabled={!pendingLinks || generateLinksMutation.isPending}
+                  title="Descarga los links de los invitados pendientes y los marca como generados"
+                >
+                  {generateLinksMutation.isPending
+                    ? "Generando..."
+                    : `🔗 Generar links (${pendingLinks})`}
+                </button>
+                <button
+                  className={styles.addGuestButton}
+                  onClick={openAddGuestModal}
+                >
+                  + Agregar invitado
+                </button>
+              </div>
             </div>
 
             {isLoadingGuests ? (